@@ -4,8 +4,20 @@ import numpy as np
 import os
 import time
 import argparse
-from math import degrees
-from collections import deque
+import queue
+import struct
+import subprocess
+import sys
+import threading
+from collections import OrderedDict
+from multiprocessing import shared_memory
+from mesh_worker import landmarks_to_array, read_reply
+# Optional: numba for a fused helmet blend kernel (falls back to OpenCV calls)
+try:
+    from numba import njit, prange
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
 # Optional: serial for MCU sync
 # import serial
 
@@ -27,14 +39,37 @@ HITBOX_SCALE = 1.2
 CLIP_PRE_SECONDS = 5.0
 CLIP_DIR = "collision_clips"
 CLIP_CODEC = 'mp4v'  # prefer mp4v on macOS
+# Frames in flight between inference and display (capture keeps only the latest)
+FRAME_QUEUE_SIZE = 2
+# Frames wider than this are downscaled before face mesh inference; landmarks are
+# normalized, so overlays still use the full-resolution frame
+INFERENCE_WIDTH = 640
+# Run face mesh on every Nth frame; in between, landmarks follow sparse optical flow
+INFERENCE_EVERY = 2
+# ...but on every frame while any head moves faster than this fraction of the alert
+# thresholds, when optical flow is least reliable
+FAST_MOTION_FRACTION = 0.3
+# Per-face pose/velocity labels (F0 P/Y/R, AV, TV); alerts and collision status are always drawn
+DEBUG_OVERLAY = True
+# Run face mesh in a separate worker process (mesh_worker.py) fed through shared
+# memory, so inference does not compete with capture and drawing for the GIL
+MESH_PROCESS = False
+MESH_TIMEOUT = 10.0  # seconds to wait for a worker reply (its first one includes model loading)
+MAX_FACES = 2
 # ----------------------------
 
 # CLI args
 parser = argparse.ArgumentParser(description="Head pose and collision detector")
 parser.add_argument("--save-video", action="store_true", help="Save output video to OUTPUT_VIDEO path")
+parser.add_argument("--no-debug-overlay", action="store_true", help="Skip the per-face pose/velocity labels")
+parser.add_argument("--mesh-process", action="store_true", help="Run face mesh in a separate worker process")
 args = parser.parse_args()
 if args.save_video:
     SAVE_VIDEO = True
+if args.no_debug_overlay:
+    DEBUG_OVERLAY = False
+if args.mesh_process:
+    MESH_PROCESS = True
 
 
 # Load helmet1.png and helmet2.png (script dir first, then ~/Desktop)
@@ -63,15 +98,57 @@ def _try_load(name):
     return None, None
 
 HELMET1_IMG, HELMET1_ALPHA = _try_load('helmet1.png')
-HELMET2_IMG, HELMET2_ALPHA = _try_load('helmet1.png')
+# both faces currently wear helmet1.png, so it is read from disk only once
+HELMET2_IMG, HELMET2_ALPHA = HELMET1_IMG, HELMET1_ALPHA
+
+def _premultiply(img, alpha):
+    # uint8 blend operands, computed once per helmet: colour already scaled by
+    # alpha, and the 3-channel inverse alpha that attenuates the frame underneath
+    if img is None:
+        return None, None
+    if alpha is None:
+        return img, None  # opaque: the helmet simply replaces the frame pixels
+    premult = ((img.astype(np.uint16) * alpha[:, :, None] + 127) // 255).astype(np.uint8)
+    inv_alpha = cv2.merge([255 - alpha] * 3)
+    return premult, inv_alpha
+
+HELMET1_PREMULT, HELMET1_INV_ALPHA = _premultiply(HELMET1_IMG, HELMET1_ALPHA)
+if HELMET2_IMG is HELMET1_IMG:
+    HELMET2_PREMULT, HELMET2_INV_ALPHA = HELMET1_PREMULT, HELMET1_INV_ALPHA
+else:
+    HELMET2_PREMULT, HELMET2_INV_ALPHA = _premultiply(HELMET2_IMG, HELMET2_ALPHA)
+
+# Resized helmet blend operands keyed by (helmet_idx, w, h), least recently used first
+HELMET_CACHE_SIZE = 8
+HELMET_SIZE_STEP = 8    # target sizes are rounded to this many pixels so jittery boxes hit the cache
+_HELMET_CACHE = OrderedDict()
+
+def _get_resized_helmet(helmet_idx, target_w, target_h):
+    if HELMET2_PREMULT is HELMET1_PREMULT:
+        helmet_idx = 0  # same image for both faces: share the resized copies
+    key = (helmet_idx, target_w, target_h)
+    entry = _HELMET_CACHE.get(key)
+    if entry is not None:
+        _HELMET_CACHE.move_to_end(key)
+        return entry
+    helm_premult = HELMET1_PREMULT if helmet_idx == 0 else HELMET2_PREMULT
+    helm_inv_a = HELMET1_INV_ALPHA if helmet_idx == 0 else HELMET2_INV_ALPHA
+    entry = (cv2.resize(helm_premult, (target_w, target_h), interpolation=cv2.INTER_AREA),
+             None if helm_inv_a is None else
+             cv2.resize(helm_inv_a, (target_w, target_h), interpolation=cv2.INTER_AREA))
+    _HELMET_CACHE[key] = entry
+    if len(_HELMET_CACHE) > HELMET_CACHE_SIZE:
+        _HELMET_CACHE.popitem(last=False)
+    return entry
 
 mp_face = mp.solutions.face_mesh
 # allow up to two faces so we can put helmets on both
-face_mesh = mp_face.FaceMesh(static_image_mode=False,
-                             max_num_faces=2,
-                             refine_landmarks=True,
-                             min_detection_confidence=0.5,
-                             min_tracking_confidence=0.5)
+# (with MESH_PROCESS the worker process builds its own instead)
+face_mesh = None if MESH_PROCESS else mp_face.FaceMesh(static_image_mode=False,
+                                                      max_num_faces=MAX_FACES,
+                                                      refine_landmarks=False,  # iris landmarks are never read
+                                                      min_detection_confidence=0.5,
+                                                      min_tracking_confidence=0.5)
 
 # 3D model points in mm (generic). These are approximate locations in a canonical face model.
 # We'll use nose tip, chin, left eye corner, right eye corner, left mouth corner, right mouth corner.
@@ -92,12 +169,22 @@ LM_LeftEye = 33    # left eye outer corner
 LM_RightEye = 263  # right eye outer corner
 LM_LeftMouth = 61  # left mouth corner
 LM_RightMouth = 291# right mouth corner
-MODEL_LM_IDX = [LM_NoseTip, LM_Chin, LM_LeftEye, LM_RightEye, LM_LeftMouth, LM_RightMouth]
+# index array rather than a list, so each fancy-index skips the list -> array conversion
+MODEL_LM_IDX = np.array([LM_NoseTip, LM_Chin, LM_LeftEye, LM_RightEye, LM_LeftMouth, LM_RightMouth], dtype=np.intp)
+# solvePnP image points, refilled in place for each face instead of allocated per face
+IMG_PTS = np.empty((len(MODEL_LM_IDX), 2), dtype=np.float64)
+# Closed-form PnP for faces with no previous pose (OpenCV >= 4.5.3); later frames
+# refine the previous pose with SOLVEPNP_ITERATIVE instead
+PNP_COLD_FLAGS = getattr(cv2, 'SOLVEPNP_SQPNP', cv2.SOLVEPNP_ITERATIVE)
 
  
 
 # Open camera
 cap = cv2.VideoCapture(VIDEO_SOURCE)
+# keep at most one frame queued in the driver (V4L2 defaults to 4) so each grab()
+# returns a fresh frame instead of one that waited behind inference; ignored by
+# backends without the property
+cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
 ret, frame = cap.read()
 if not ret:
     raise RuntimeError("Could not open webcam")
@@ -118,6 +205,15 @@ camera_matrix = np.array(
      [0, 0, 1]], dtype="double"
 )
 dist_coeffs = np.zeros((4,1))  # assume no lens distortion
+# normalized landmark (x, y) -> pixel scale
+FRAME_WH = np.array([w, h], dtype=np.float32)
+# upper clip bounds for an (x_min, y_min, x_max, y_max) box
+BOX_MAX = np.array([w-1, h-1, w-1, h-1], dtype=np.float64)
+# (width, height) of the frame passed to face_mesh, or None to use it as captured
+INFER_SIZE = (INFERENCE_WIDTH, int(round(h * INFERENCE_WIDTH / w))) if w > INFERENCE_WIDTH else None
+INFER_SCALE = INFER_SIZE[0] / w if INFER_SIZE else 1.0  # full-res pixels -> inference pixels
+LK_PARAMS = dict(winSize=(21, 21), maxLevel=2,
+                 criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 10, 0.03))
 
 # Video writer
 if SAVE_VIDEO:
@@ -127,6 +223,7 @@ if SAVE_VIDEO:
 # for multi-face support keep per-face previous pose values (indexed by face index)
 prev_rvecs = []
 prev_tvecs = []
+prev_eulers = []  # (pitch, yaw, roll) of prev_rvecs, so they are not recomputed
 prev_time = time.time()
 
 # Collision state
@@ -134,50 +231,83 @@ collision_count = 0
 currently_overlapping = False
 
 # Collision clip state
-prebuffer = deque()  # holds tuples of (timestamp, frame_with_overlays)
-clip_active = False
-clip_writer = None
+clip_q = queue.Queue(maxsize=1)  # clip job for the clip writer thread
+# Exactly two prebuffer rings exist: the one being filled below and a spare, which
+# either waits here or is held by the clip writer while it encodes a clip
+_spare_rings = queue.Queue(maxsize=1)
+_pending_clip = None  # (trigger time, frame size) of a clip waiting for the spare ring
 clip_fps = 20.0  # will try to pull from camera
+# Pre-event frames (with overlays) live in a fixed ring allocated once, so each
+# frame is copied into an existing slot rather than into a new array
+PREBUFFER_LEN = int(max(1, int(CLIP_PRE_SECONDS * clip_fps)))
+prebuffer_frames = np.empty((PREBUFFER_LEN, h, w, 3), dtype=np.uint8)
+prebuffer_ts = np.empty(PREBUFFER_LEN, dtype=np.float64)
+prebuffer_head = 0  # next slot to write
+prebuffer_size = 0  # slots holding a frame
+_spare_rings.put((np.empty_like(prebuffer_frames), np.empty_like(prebuffer_ts)))
 
 # Config
 DEPTH_DIFF_MAX = 200.0    # mm
 DIST_3D_MAX = 400.0       # mm
+DIST_3D_MAX_SQ = DIST_3D_MAX * DIST_3D_MAX
 FRAMES_CONFIRM = 2
 overlap_streak = 0
 
-def rotationVectorToEuler(rvec):
-    # get rotation matrix
-    R, _ = cv2.Rodrigues(rvec)
-    sy = np.sqrt(R[0,0]*R[0,0] + R[1,0]*R[1,0])
+def _dist3_sq(a, b):
+    # squared distance between two (3,1) tvecs; plain float math beats
+    # np.linalg.norm dispatch on 3 elements
+    ax, ay, az = a[:, 0].tolist()
+    bx, by, bz = b[:, 0].tolist()
+    dx = ax - bx
+    dy = ay - by
+    dz = az - bz
+    return dx*dx + dy*dy + dz*dz
+
+def rotationVectorsToEuler(rvecs):
+    # N rotation vectors -> (N, 3) degrees: pitch (x), yaw (y), roll (z).
+    # Rodrigues stays in OpenCV; the trig runs once across all faces, with the
+    # gimbal-lock case selected by np.where instead of a per-face branch
+    R = np.stack([cv2.Rodrigues(rvec)[0] for rvec in rvecs])
+    sy = np.hypot(R[:, 0, 0], R[:, 1, 0])
     singular = sy < 1e-6
-    if not singular:
-        x = np.arctan2(R[2,1], R[2,2])
-        y = np.arctan2(-R[2,0], sy)
-        z = np.arctan2(R[1,0], R[0,0])
-    else:
-        x = np.arctan2(-R[1,2], R[1,1])
-        y = np.arctan2(-R[2,0], sy)
-        z = 0
-    # return degrees: pitch (x), yaw (y), roll (z)
-    return degrees(x), degrees(y), degrees(z)
-
-def draw_axes(img, rvec, tvec, camera_matrix, dist_coeffs, size=50):
-    # draw 3 axes
-    axis = np.float32([[size, 0, 0], [0, size, 0], [0, 0, size]]).reshape(-1, 3)
+    x = np.where(singular, np.arctan2(-R[:, 1, 2], R[:, 1, 1]), np.arctan2(R[:, 2, 1], R[:, 2, 2]))
+    y = np.arctan2(-R[:, 2, 0], sy)
+    z = np.where(singular, 0.0, np.arctan2(R[:, 1, 0], R[:, 0, 0]))
+    return np.degrees(np.stack((x, y, z), axis=1))
+
+# Overlay fonts
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+FONT_ALERT = cv2.FONT_HERSHEY_DUPLEX
+
+# Axis endpoints for draw_axes: origin first, then X, Y and Z tips
+AXIS_SIZE = 50
+AXIS_PTS = np.float32([[0, 0, 0], [AXIS_SIZE, 0, 0], [0, AXIS_SIZE, 0], [0, 0, AXIS_SIZE]])
+
+def draw_axes(img, rvec, tvec, camera_matrix, dist_coeffs, size=AXIS_SIZE):
+    # draw 3 axes; origin and tips come from a single projection
+    axis = AXIS_PTS if size == AXIS_SIZE else AXIS_PTS * (size / AXIS_SIZE)
     imgpts, _ = cv2.projectPoints(axis, rvec, tvec, camera_matrix, dist_coeffs)
-    # Project the origin (0,0,0)
-    orig_pts, _ = cv2.projectPoints(np.array([[0.0, 0.0, 0.0]], dtype=np.float64), rvec, tvec, camera_matrix, dist_coeffs)
     # Convert all to plain Python int tuples (OpenCV expects native int types)
-    origin = tuple(map(int, orig_pts.reshape(-1, 2)[0]))
-    xpt = tuple(map(int, imgpts[0].ravel()))
-    ypt = tuple(map(int, imgpts[1].ravel()))
-    zpt = tuple(map(int, imgpts[2].ravel()))
+    origin, xpt, ypt, zpt = map(tuple, imgpts.reshape(-1, 2).astype(np.int32).tolist())
     # draw lines
     cv2.line(img, origin, xpt, (0, 0, 255), 2)  # X axis in red
     cv2.line(img, origin, ypt, (0, 255, 0), 2)  # Y axis in green
     cv2.line(img, origin, zpt, (255, 0, 0), 2)  # Z axis in blue
 
 
+if HAVE_NUMBA:
+    # explicit any-layout signature: compiled at import, for the sliced (non-contiguous)
+    # ROI and helmet views it is always called with, not on the first helmet
+    @njit("void(u1[:, :, :], u1[:, :, :], u1[:, :, :])", parallel=True, cache=True, nogil=True)
+    def _blend_premult_u8(roi, premult, inv_alpha):
+        # roi = premult + roi * inv_alpha / 255 in one pass, in place, integers only
+        rows, cols, chans = roi.shape
+        for r in prange(rows):
+            for c in range(cols):
+                for k in range(chans):
+                    under = (int(roi[r, c, k]) * int(inv_alpha[r, c, k]) + 127) // 255
+                    roi[r, c, k] = min(int(premult[r, c, k]) + under, 255)
+
 def draw_helmet(img, x_min, y_min, x_max, y_max, yaw=0.0, color=None, helmet_idx=0, target_size=None):
     """
     Draw a stylized football helmet around the head bounding box.
@@ -199,24 +329,18 @@ def draw_helmet(img, x_min, y_min, x_max, y_max, yaw=0.0, color=None, helmet_idx
     axes = (max(4, helm_w // 2), max(4, helm_h // 2))
 
     # If we have a helmet image (choose helmet1 or helmet2), scale and place it into place and alpha-blend.
-    helm_img = HELMET1_IMG if helmet_idx == 0 else HELMET2_IMG
-    helm_a = HELMET1_ALPHA if helmet_idx == 0 else HELMET2_ALPHA
-    if helm_img is not None:
+    helm_premult = HELMET1_PREMULT if helmet_idx == 0 else HELMET2_PREMULT
+    if helm_premult is not None:
         # desired helmet size (make it twice as big)
         if target_size is not None:
             target_w, target_h = int(target_size[0]), int(target_size[1])
         else:
             target_w = max(1, int(helm_w * 2.0))
             target_h = max(1, int(helm_h * 2.0))
-        # resize helmet image
-        helm_rgb = cv2.resize(helm_img, (target_w, target_h), interpolation=cv2.INTER_AREA)
-        # prepare single-channel alpha (0..1)
-        if helm_a is not None:
-            helm_alpha = cv2.resize(helm_a, (target_w, target_h), interpolation=cv2.INTER_AREA)
-            helm_alpha = helm_alpha.astype(float) / 255.0
-        else:
-            # fully opaque if no alpha channel
-            helm_alpha = np.ones((target_h, target_w), dtype=float)
+        target_w = max(HELMET_SIZE_STEP, (target_w + HELMET_SIZE_STEP // 2) // HELMET_SIZE_STEP * HELMET_SIZE_STEP)
+        target_h = max(HELMET_SIZE_STEP, (target_h + HELMET_SIZE_STEP // 2) // HELMET_SIZE_STEP * HELMET_SIZE_STEP)
+        # premultiplied helmet and inverse alpha at this size, resized only on a cache miss
+        helm_rgb, helm_inv_alpha = _get_resized_helmet(helmet_idx, target_w, target_h)
 
         # No rotation: just placement. center the helmet slightly above face center
         top_left_x = int(cx - target_w / 2)
@@ -231,40 +355,33 @@ def draw_helmet(img, x_min, y_min, x_max, y_max, yaw=0.0, color=None, helmet_idx
         roi_w = x1 - x0
         roi_h = y1 - y0
         if roi_w > 0 and roi_h > 0:
-            helm_crop = helm_rgb[(y0 - top_left_y):(y0 - top_left_y) + roi_h, (x0 - top_left_x):(x0 - top_left_x) + roi_w].astype(float)
-            alpha_crop = helm_alpha[(y0 - top_left_y):(y0 - top_left_y) + roi_h, (x0 - top_left_x):(x0 - top_left_x) + roi_w].astype(float)
-            # ensure alpha has 3 channels for blending
-            alpha_3 = np.repeat(alpha_crop[:, :, None], 3, axis=2)
-            img_section = img[y0:y1, x0:x1].astype(float)
-            comp = (alpha_3 * helm_crop + (1 - alpha_3) * img_section)
-            img[y0:y1, x0:x1] = comp.astype(np.uint8)
+            helm_crop = helm_rgb[(y0 - top_left_y):(y0 - top_left_y) + roi_h, (x0 - top_left_x):(x0 - top_left_x) + roi_w]
+            roi = img[y0:y1, x0:x1]
+            if helm_inv_alpha is None:
+                np.copyto(roi, helm_crop)
+            else:
+                inv_alpha_crop = helm_inv_alpha[(y0 - top_left_y):(y0 - top_left_y) + roi_h, (x0 - top_left_x):(x0 - top_left_x) + roi_w]
+                # blend in place in uint8: roi = roi * (1 - alpha) + helmet * alpha
+                if HAVE_NUMBA:
+                    _blend_premult_u8(roi, helm_crop, inv_alpha_crop)
+                else:
+                    cv2.multiply(roi, inv_alpha_crop, dst=roi, scale=1.0 / 255.0)
+                    cv2.add(roi, helm_crop, dst=roi)
         return
     else:
         return
 
-def _intersect_area_xyxy(a, b):
-    ax1, ay1, ax2, ay2 = a
-    bx1, by1, bx2, by2 = b
-    ix1 = max(ax1, bx1)
-    iy1 = max(ay1, by1)
-    ix2 = min(ax2, bx2)
-    iy2 = min(ay2, by2)
-    iw = max(0, ix2 - ix1)
-    ih = max(0, iy2 - iy1)
-    return iw * ih
-
-def compute_iou(box_a, box_b):
-    ax1, ay1, ax2, ay2 = box_a
-    bx1, by1, bx2, by2 = box_b
-    inter = _intersect_area_xyxy((ax1, ay1, ax2, ay2), (bx1, by1, bx2, by2))
-    if inter <= 0:
-        return 0.0
-    area_a = max(0, (ax2 - ax1)) * max(0, (ay2 - ay1))
-    area_b = max(0, (bx2 - bx1)) * max(0, (by2 - by1))
-    union = area_a + area_b - inter
-    if union <= 0:
-        return 0.0
-    return inter / union
+def pairwise_iou(bboxes):
+    # IoU of every pair of (x_min, y_min, x_max, y_max) boxes as one broadcast; (N, N)
+    b = np.asarray(bboxes, dtype=np.float64)
+    ix1 = np.maximum(b[:, None, 0], b[None, :, 0])
+    iy1 = np.maximum(b[:, None, 1], b[None, :, 1])
+    ix2 = np.minimum(b[:, None, 2], b[None, :, 2])
+    iy2 = np.minimum(b[:, None, 3], b[None, :, 3])
+    inter = np.maximum(0, ix2 - ix1) * np.maximum(0, iy2 - iy1)
+    areas = np.maximum(0, b[:, 2] - b[:, 0]) * np.maximum(0, b[:, 3] - b[:, 1])
+    union = areas[:, None] + areas[None, :] - inter
+    return np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
 
 def _ensure_clip_dir():
     try:
@@ -275,91 +392,338 @@ def _ensure_clip_dir():
     os.makedirs(out_dir, exist_ok=True)
     return out_dir
 
+# resolved and created once, not on every collision
+CLIP_OUT_DIR = _ensure_clip_dir()
+
 def _start_collision_clip(now_ts, frame_size):
-    global clip_active, clip_writer
-    out_dir = _ensure_clip_dir()
+    # Queue a pre-event clip; it is handed to the clip writer as soon as the spare
+    # ring is free (normally at once)
+    global _pending_clip
+    if _pending_clip is not None:
+        # its pre-event window is mostly the waiting clip's, which keeps the frames
+        print(f"Collision clip at {time.strftime('%H:%M:%S', time.localtime(now_ts))} dropped: "
+              "the previous clip is still waiting for the clip writer")
+        return False
+    _pending_clip = (now_ts, frame_size)
+    return _flush_pending_clip()
+
+def _flush_pending_clip(timeout=0):
+    # Hand the pre-event ring to the clip writer thread and continue on the spare
+    # ring, so encoding never stalls the main loop. While the writer still holds the
+    # spare the clip keeps waiting; frames older than its window may be overwritten
+    # meanwhile, which shortens the clip rather than allocating another ring
+    global prebuffer_frames, prebuffer_ts, prebuffer_head, prebuffer_size, _pending_clip
+    if _pending_clip is None:
+        return False
+    try:
+        spare = _spare_rings.get(timeout=timeout) if timeout else _spare_rings.get_nowait()
+    except queue.Empty:
+        return False
+    now_ts, frame_size = _pending_clip
+    _pending_clip = None
+    out_dir = CLIP_OUT_DIR
     ts_str = time.strftime('%Y%m%d_%H%M%S', time.localtime(now_ts))
     filename = f"collision_{ts_str}.mp4"
     out_path = os.path.join(out_dir, filename)
-    fourcc = cv2.VideoWriter_fourcc(*CLIP_CODEC)
-    writer = cv2.VideoWriter(out_path, fourcc, clip_fps, frame_size)
-    if not writer.isOpened():
-        return False
-    # write prebuffer frames within the window [now - CLIP_PRE_SECONDS, now]
-    min_ts = now_ts - CLIP_PRE_SECONDS
-    for ts, fr in list(prebuffer):
-        if ts >= min_ts and ts <= now_ts:
-            writer.write(fr)
-    clip_writer = writer
-    clip_active = True
+    start = (prebuffer_head - prebuffer_size) % PREBUFFER_LEN
+    order = [(start + k) % PREBUFFER_LEN for k in range(prebuffer_size)]  # oldest first
+    # never full: with the spare free, the writer holds no ring and no job is queued
+    clip_q.put_nowait((out_path, frame_size, prebuffer_frames, prebuffer_ts, order, now_ts))
+    prebuffer_frames, prebuffer_ts = spare
+    prebuffer_head = 0
+    prebuffer_size = 0
     return True
 
-def _finish_collision_clip():
-    global clip_active, clip_writer
-    if clip_active and clip_writer is not None:
+def _clip_writer_loop():
+    while True:
+        job = clip_q.get()
+        if job is None:
+            break
+        out_path, frame_size, frames, frame_ts, order, now_ts = job
         try:
-            clip_writer.release()
-        except Exception:
+            fourcc = cv2.VideoWriter_fourcc(*CLIP_CODEC)
+            writer = cv2.VideoWriter(out_path, fourcc, clip_fps, frame_size)
+            if writer.isOpened():
+                # write prebuffer frames within the window [now - CLIP_PRE_SECONDS, now]
+                min_ts = now_ts - CLIP_PRE_SECONDS
+                for i in order:
+                    if min_ts <= frame_ts[i] <= now_ts:
+                        writer.write(frames[i])
+                writer.release()
+        finally:
+            # the ring is free again; the next collision can swap it back in
+            _spare_rings.put((frames, frame_ts))
+
+# Full-session recording (SAVE_VIDEO): encoding runs on its own thread so the main
+# loop never waits on the codec; if it falls behind, the oldest frames are dropped
+VIDEO_QUEUE_SIZE = 4
+video_q = queue.Queue(maxsize=VIDEO_QUEUE_SIZE)
+
+def _video_writer_loop():
+    while True:
+        frame = video_q.get()
+        if frame is None:
+            break
+        out.write(frame)
+
+# Pipeline: a capture thread feeds an inference thread, which feeds the main
+# thread (overlays, display, clips). face_mesh is only ever used by the
+# inference thread since the MediaPipe solution is not thread-safe.
+# capture -> inference is a single "latest frame" slot, filled on demand: inference
+# sets frame_wanted when it is ready, and capture decodes the next frame it grabs.
+# Face mesh therefore always gets the newest grab, and frames grabbed while it is
+# busy are never decoded
+capture_q = queue.Queue(maxsize=1)
+frame_wanted = threading.Event()
+_grab_seq = 0  # grabs so far; written only by the capture thread
+result_q = queue.Queue(maxsize=FRAME_QUEUE_SIZE)
+stop_event = threading.Event()
+fast_motion = threading.Event()  # set by the main thread; makes inference run every frame
+
+def _put_drop_oldest(q, item, on_drop=None):
+    # never block the producer: discard the stalest queued item instead
+    while True:
+        try:
+            q.put_nowait(item)
+            return
+        except queue.Full:
+            try:
+                dropped = q.get_nowait()
+            except queue.Empty:
+                continue
+            if on_drop is not None and dropped is not None:
+                on_drop(dropped)
+
+def _put_until_stopped(q, item):
+    while not stop_event.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return
+        except queue.Full:
             pass
-        clip_writer = None
-        clip_active = False
+
+def _mesh_reply_loop(stream):
+    try:
+        while True:
+            _mesh_replies.put(read_reply(stream))
+    except EOFError:
+        _mesh_replies.put(None)  # worker exited
+
+# RGB buffers for face mesh input, reused instead of allocating one per frame.
+# A buffer is either free here, queued for inference, or being processed.
+RGB_POOL_SIZE = FRAME_QUEUE_SIZE + 2
+_rgb_shape = (INFER_SIZE[1], INFER_SIZE[0], 3) if INFER_SIZE else (h, w, 3)
+if MESH_PROCESS:
+    # buffers live in shared memory so the mesh worker reads frames without a copy
+    _rgb_shm = shared_memory.SharedMemory(create=True, size=RGB_POOL_SIZE * int(np.prod(_rgb_shape)))
+    _rgb_bufs = list(np.ndarray((RGB_POOL_SIZE,) + _rgb_shape, dtype=np.uint8, buffer=_rgb_shm.buf))
+    _rgb_slots = {id(buf): i for i, buf in enumerate(_rgb_bufs)}
+    _mesh_worker = subprocess.Popen(
+        [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "mesh_worker.py"),
+         _rgb_shm.name, str(RGB_POOL_SIZE), str(_rgb_shape[0]), str(_rgb_shape[1]), str(MAX_FACES)],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    # replies are read on their own thread, so the inference thread can wait with a timeout
+    _mesh_replies = queue.Queue()
+    _mesh_reply_thread = threading.Thread(target=_mesh_reply_loop, args=(_mesh_worker.stdout,),
+                                          name="mesh-replies", daemon=True)
+    _mesh_reply_thread.start()
+else:
+    _rgb_bufs = [np.empty(_rgb_shape, dtype=np.uint8) for _ in range(RGB_POOL_SIZE)]
+_rgb_pool = queue.Queue()
+for buf in _rgb_bufs:
+    _rgb_pool.put(buf)
+
+def _release_capture_item(item):
+    _rgb_pool.put(item[3])
+
+# Optional CUDA path for the capture thread's resize + BGR->RGB conversion. Device
+# buffers are allocated once and reused on a single stream; everything else
+# (helmet blend, drawing) stays on the CPU where the small ROIs are cheaper.
+try:
+    USE_CUDA = cv2.cuda.getCudaEnabledDeviceCount() > 0
+except (AttributeError, cv2.error):
+    USE_CUDA = False
+if USE_CUDA:
+    infer_w, infer_h = INFER_SIZE if INFER_SIZE else (w, h)
+    _gpu_stream = cv2.cuda.Stream()
+    _gpu_frame = cv2.cuda_GpuMat(h, w, cv2.CV_8UC3)
+    _gpu_small = cv2.cuda_GpuMat(infer_h, infer_w, cv2.CV_8UC3)
+    _gpu_rgb = cv2.cuda_GpuMat(infer_h, infer_w, cv2.CV_8UC3)
+
+def _to_inference_rgb(frame, dst):
+    # downscale (if needed) and convert a captured BGR frame into dst
+    if USE_CUDA:
+        _gpu_frame.upload(frame, _gpu_stream)
+        small = _gpu_frame
+        if INFER_SIZE:
+            small = cv2.cuda.resize(_gpu_frame, INFER_SIZE, dst=_gpu_small,
+                                    interpolation=cv2.INTER_AREA, stream=_gpu_stream)
+        cv2.cuda.cvtColor(small, cv2.COLOR_BGR2RGB, dst=_gpu_rgb, stream=_gpu_stream)
+        _gpu_rgb.download(_gpu_stream, dst)
+        _gpu_stream.waitForCompletion()
+        return dst
+    small = cv2.resize(frame, INFER_SIZE, interpolation=cv2.INTER_AREA) if INFER_SIZE else frame
+    return cv2.cvtColor(small, cv2.COLOR_BGR2RGB, dst=dst)
+
+def _capture_loop():
+    global _grab_seq
+    try:
+        while not stop_event.is_set():
+            if not cap.grab():
+                break
+            _grab_seq += 1
+            # timestamp at capture so velocities use when the frame was taken
+            now = time.time()
+            if not frame_wanted.is_set():
+                # inference is still busy: keep draining the driver with grab(), but
+                # skip this frame before paying for its decode
+                continue
+            frame_wanted.clear()
+            seq = _grab_seq
+            ret, frame = cap.retrieve()
+            if not ret:
+                break
+            # the pool buffer itself is passed on (not cvtColor's return value) so it
+            # always goes back to the pool and keeps its shared-memory slot
+            frame_rgb = _rgb_pool.get()
+            _to_inference_rgb(frame, frame_rgb)
+            _put_drop_oldest(capture_q, (now, seq, frame, frame_rgb), on_drop=_release_capture_item)
+    finally:
+        _put_drop_oldest(capture_q, None)  # end of stream
+
+def _landmarks_to_pixels(face_landmarks):
+    # all landmarks to full-res float pixels in one vectorized multiply
+    return landmarks_to_array(face_landmarks) * FRAME_WH
+
+def _detect_faces(frame_rgb):
+    # run face mesh on one RGB buffer; per face an (N, 2) float32 array of full-res pixels
+    if not MESH_PROCESS:
+        # read-only view: MediaPipe then wraps the pixels instead of copying them,
+        # while the pool buffer itself stays writable for the next cvtColor
+        view = frame_rgb.view()
+        view.flags.writeable = False
+        results = face_mesh.process(view)
+        return [_landmarks_to_pixels(fl) for fl in results.multi_face_landmarks or ()]
+    # the buffer already sits in shared memory: send its slot, read back the landmarks
+    slot = _rgb_slots[id(frame_rgb)]
+    _mesh_worker.stdin.write(struct.pack('<I', slot))
+    _mesh_worker.stdin.flush()
+    try:
+        reply = _mesh_replies.get(timeout=MESH_TIMEOUT)
+    except queue.Empty:
+        raise RuntimeError(f"face mesh worker sent no reply within {MESH_TIMEOUT:.0f} s") from None
+    if reply is None:
+        raise RuntimeError(f"face mesh worker exited (code {_mesh_worker.poll()})")
+    reply_slot, faces = reply
+    if reply_slot != slot:
+        raise RuntimeError(f"face mesh worker reply out of sync (slot {reply_slot}, expected {slot})")
+    return [pts * FRAME_WH for pts in faces]
+
+def _track_faces(prev_gray, gray, faces):
+    # Follow each face's MODEL_LM_IDX points with LK optical flow and shift the
+    # remaining landmarks by their median motion. Returns None if any point is lost.
+    if not faces:
+        return faces
+    src = np.concatenate([pts[MODEL_LM_IDX] for pts in faces]) * INFER_SCALE
+    dst, status, _ = cv2.calcOpticalFlowPyrLK(prev_gray, gray, src.reshape(-1, 1, 2), None, **LK_PARAMS)
+    if dst is None or not status.all():
+        return None
+    dst = dst.reshape(len(faces), len(MODEL_LM_IDX), 2) / INFER_SCALE
+    tracked = []
+    for pts, model_pts in zip(faces, dst):
+        moved = pts + np.median(model_pts - pts[MODEL_LM_IDX], axis=0)
+        moved[MODEL_LM_IDX] = model_pts
+        tracked.append(moved)
+    return tracked
+
+def _inference_loop():
+    frame_idx = 0
+    prev_gray = None
+    faces = []
+    try:
+        while not stop_event.is_set():
+            newest_grab = _grab_seq
+            frame_wanted.set()
+            item = capture_q.get()
+            if item is None:
+                break
+            now, seq, frame, frame_rgb = item
+            # never a frame left waiting from before this request: at least the newest
+            # grab at the time inference asked
+            assert seq >= newest_grab, (seq, newest_grab)
+            gray = cv2.cvtColor(frame_rgb, cv2.COLOR_RGB2GRAY) if INFERENCE_EVERY > 1 else None
+            tracked = None
+            every = 1 if fast_motion.is_set() else INFERENCE_EVERY
+            if frame_idx % every and prev_gray is not None:
+                tracked = _track_faces(prev_gray, gray, faces)
+            if tracked is None:
+                faces = _detect_faces(frame_rgb)
+            else:
+                faces = tracked
+            _rgb_pool.put(frame_rgb)
+            prev_gray = gray
+            frame_idx += 1
+            # per face: (N, 2) float32 landmark pixels in full-res frame coordinates
+            _put_until_stopped(result_q, (now, frame, faces))
+    finally:
+        _put_until_stopped(result_q, None)  # end of stream, also if face mesh failed
+
+capture_thread = threading.Thread(target=_capture_loop, name="capture", daemon=True)
+inference_thread = threading.Thread(target=_inference_loop, name="inference", daemon=True)
+clip_thread = threading.Thread(target=_clip_writer_loop, name="clip-writer", daemon=True)
+video_thread = threading.Thread(target=_video_writer_loop, name="video-writer", daemon=True)
+
+capture_thread.start()
+inference_thread.start()
+clip_thread.start()
+if SAVE_VIDEO:
+    video_thread.start()
 
 # Main loop
 try:
     while True:
-        ret, frame = cap.read()
-        if not ret:
+        item = result_q.get()
+        if item is None:
             break
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = face_mesh.process(frame_rgb)
-
-        now = time.time()
-        dt = now - prev_time if 'prev_time' in globals() else 0.0
+        now, frame, faces = item
+        dt = now - prev_time
+        any_fast = False  # some face moving fast enough that inference should not skip frames
 
-        if results.multi_face_landmarks:
+        if faces:
             detections = []
-            num_faces = len(results.multi_face_landmarks)
+            num_faces = len(faces)
             # ensure previous vectors list sizes match
             while len(prev_rvecs) < num_faces:
                 prev_rvecs.append(None)
             while len(prev_tvecs) < num_faces:
                 prev_tvecs.append(None)
+            while len(prev_eulers) < num_faces:
+                prev_eulers.append(None)
 
             # first pass: compute bboxes, poses and basic stats, collect detections
-            for fi, face_landmarks in enumerate(results.multi_face_landmarks):
-                all_pts = []
-                for lm in face_landmarks.landmark:
-                    x_px = int(lm.x * w)
-                    y_px = int(lm.y * h)
-                    all_pts.append((x_px, y_px))
-                all_pts = np.array(all_pts, dtype=np.int32)
-                # base padded box from landmarks
-                base_xmin = float(all_pts[:,0].min() - BOX_PADDING)
-                base_ymin = float(all_pts[:,1].min() - BOX_PADDING)
-                base_xmax = float(all_pts[:,0].max() + BOX_PADDING)
-                base_ymax = float(all_pts[:,1].max() + BOX_PADDING)
-                # scale hitbox about its center
-                c_x = 0.5 * (base_xmin + base_xmax)
-                c_y = 0.5 * (base_ymin + base_ymax)
-                half_w = 0.5 * (base_xmax - base_xmin) * HITBOX_SCALE
-                half_h = 0.5 * (base_ymax - base_ymin) * HITBOX_SCALE
-                x_min = int(np.clip(c_x - half_w, 0, w-1))
-                x_max = int(np.clip(c_x + half_w, 0, w-1))
-                y_min = int(np.clip(c_y - half_h, 0, h-1))
-                y_max = int(np.clip(c_y + half_h, 0, h-1))
-
-                image_points = []
-                for idx in MODEL_LM_IDX:
-                    lm = face_landmarks.landmark[idx]
-                    x_px = int(lm.x * w)
-                    y_px = int(lm.y * h)
-                    image_points.append((x_px, y_px))
-                image_points = np.array(image_points, dtype=np.float64)
-
-                success, rvec, tvec = cv2.solvePnP(MODEL_POINTS, image_points, camera_matrix, dist_coeffs, flags=cv2.SOLVEPNP_ITERATIVE)
+            for fi, face_pts in enumerate(faces):
+                all_pts = face_pts.astype(np.int32)
+                # base padded box from landmarks (one min and one max reduction)
+                base_min = all_pts.min(0) - BOX_PADDING
+                base_max = all_pts.max(0) + BOX_PADDING
+                # scale hitbox about its center, then clip all four edges at once
+                c_xy = 0.5 * (base_min + base_max)
+                half_wh = 0.5 * (base_max - base_min) * HITBOX_SCALE
+                xyxy = np.concatenate((c_xy - half_wh, c_xy + half_wh))
+                np.clip(xyxy, 0, BOX_MAX, out=xyxy)
+                x_min, y_min, x_max, y_max = xyxy.astype(np.int32).tolist()
+
+                IMG_PTS[:] = all_pts[MODEL_LM_IDX]
+
+                if prev_rvecs[fi] is not None:
+                    # last frame's pose is a close initial guess, so LM converges in very few steps
+                    success, rvec, tvec = cv2.solvePnP(MODEL_POINTS, IMG_PTS, camera_matrix, dist_coeffs,
+                                                       rvec=prev_rvecs[fi].copy(), tvec=prev_tvecs[fi].copy(),
+                                                       useExtrinsicGuess=True, flags=cv2.SOLVEPNP_ITERATIVE)
+                else:
+                    success, rvec, tvec = cv2.solvePnP(MODEL_POINTS, IMG_PTS, camera_matrix, dist_coeffs, flags=PNP_COLD_FLAGS)
                 if not success:
                     continue
-                pitch, yaw, roll = rotationVectorToEuler(rvec)
 
                 # compute tentative helmet size for this face (2x bbox width/height baseline)
                 bw = x_max - x_min
@@ -372,14 +736,17 @@ try:
                     'bbox': (x_min, y_min, x_max, y_max),
                     'rvec': rvec,
                     'tvec': tvec,
-                    'pitch': pitch,
-                    'yaw': yaw,
-                    'roll': roll,
                     'tentative_size': (tentative_w, tentative_h)
                 })
 
             # decide a common target size for all detected faces (use max width/height)
             if detections:
+                # head angles for every face in one batched conversion
+                eulers = rotationVectorsToEuler([d['rvec'] for d in detections])
+                for dd, euler in zip(detections, eulers):
+                    dd['euler'] = euler
+                    dd['pitch'], dd['yaw'], dd['roll'] = euler.tolist()
+
                 max_w = max(d['tentative_size'][0] for d in detections)
                 max_h = max(d['tentative_size'][1] for d in detections)
                 common_size = (max_w, max_h)
@@ -390,36 +757,36 @@ try:
                     x_min, y_min, x_max, y_max = dd['bbox']
                     rvec = dd['rvec']
                     tvec = dd['tvec']
+                    euler = dd['euler']
                     pitch, yaw, roll = dd['pitch'], dd['yaw'], dd['roll']
 
                     # draw landmark points for visibility
-                    for idx in MODEL_LM_IDX:
-                        lm = results.multi_face_landmarks[fi].landmark[idx]
-                        x_px = int(lm.x * w)
-                        y_px = int(lm.y * h)
+                    for x_px, y_px in faces[fi][MODEL_LM_IDX].astype(np.int32).tolist():
                         cv2.circle(frame, (x_px,y_px), 2, (0,255,255), -1)
 
                     # compute velocities similar to before
-                    prev_rvec = prev_rvecs[fi]
+                    prev_euler = prev_eulers[fi]
                     prev_tvec = prev_tvecs[fi]
                     ang_vel = None
                     trans_vel = None
-                    if prev_rvec is not None and dt > 1e-6:
-                        prev_angles = rotationVectorToEuler(prev_rvec)
-                        ang_vel = np.abs(np.array([pitch, yaw, roll]) - np.array(prev_angles)) / dt
+                    if prev_euler is not None and dt > 1e-6:
+                        ang_vel = np.abs(euler - prev_euler) / dt
                     if prev_tvec is not None and dt > 1e-6:
-                        trans_vel = np.linalg.norm((tvec - prev_tvec).ravel()) / (dt)
-
-                    # labeling and box
-                    label_x = max(10, x_min)
-                    label_y = max(20, y_min - 10)
-                    cv2.putText(frame, f"F{fi} P:{pitch:+.0f} Y:{yaw:+.0f} R:{roll:+.0f}", (label_x, label_y), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255,255,255),1)
-                    if ang_vel is not None:
-                        cv2.putText(frame, f"AV:{ang_vel.max():.0f}", (label_x, label_y+12), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (0,255,255),1)
-                    if trans_vel is not None:
-                        cv2.putText(frame, f"TV:{trans_vel:.0f}", (label_x, label_y+24), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (0,255,255),1)
-
-                    draw_axes(frame, rvec, tvec, camera_matrix, dist_coeffs, size=50)
+                        trans_vel = _dist3_sq(tvec, prev_tvec) ** 0.5 / dt
+
+                    # labeling and box (putText is costly, so the pose labels are optional)
+                    if DEBUG_OVERLAY:
+                        label_x = max(10, x_min)
+                        label_y = max(20, y_min - 10)
+                        # angles rounded to ints once; %d formatting is cheaper than f"{x:+.0f}"
+                        pitch_i, yaw_i, roll_i = np.rint(euler).astype(np.int64).tolist()
+                        cv2.putText(frame, "F%d P:%+d Y:%+d R:%+d" % (fi, pitch_i, yaw_i, roll_i), (label_x, label_y), FONT, 0.5, (255,255,255),1)
+                        if ang_vel is not None:
+                            cv2.putText(frame, "AV:%d" % round(float(ang_vel.max())), (label_x, label_y+12), FONT, 0.4, (0,255,255),1)
+                        if trans_vel is not None:
+                            cv2.putText(frame, "TV:%d" % round(trans_vel), (label_x, label_y+24), FONT, 0.4, (0,255,255),1)
+
+                    draw_axes(frame, rvec, tvec, camera_matrix, dist_coeffs)
 
                     box_color = (0, 255, 0)
                     turned_text = None
@@ -428,7 +795,7 @@ try:
                         turned_text = "Turned Right" if yaw < 0 else "Turned Left"
                     cv2.rectangle(frame, (x_min, y_min), (x_max, y_max), box_color, 2)
                     if turned_text:
-                        cv2.putText(frame, turned_text, (x_min, max(y_min-10,0)), cv2.FONT_HERSHEY_SIMPLEX, 0.6, box_color, 2)
+                        cv2.putText(frame, turned_text, (x_min, max(y_min-10,0)), FONT, 0.6, box_color, 2)
 
                     # choose helmet image index: 0 for first face, 1 for second or later
                     helmet_idx = 0 if fi == 0 else 1
@@ -438,36 +805,38 @@ try:
                     alert = False
                     if ang_vel is not None and ang_vel.max() > ANGULAR_VEL_THRESHOLD:
                         alert = True
-                        cv2.putText(frame, f"ALERT F{fi}: HIGH ROTATION", (10, 140 + fi*20), cv2.FONT_HERSHEY_DUPLEX, 0.5, (0,0,255),1)
+                        cv2.putText(frame, "ALERT F%d: HIGH ROTATION" % fi, (10, 140 + fi*20), FONT_ALERT, 0.5, (0,0,255),1)
                     if trans_vel is not None and trans_vel > TRANSLATION_THRESHOLD:
                         alert = True
-                        cv2.putText(frame, f"ALERT F{fi}: LARGE TRANS", (10, 160 + fi*20), cv2.FONT_HERSHEY_DUPLEX, 0.5, (0,0,255),1)
+                        cv2.putText(frame, "ALERT F%d: LARGE TRANS" % fi, (10, 160 + fi*20), FONT_ALERT, 0.5, (0,0,255),1)
+                    if ((ang_vel is not None and ang_vel.max() > FAST_MOTION_FRACTION * ANGULAR_VEL_THRESHOLD) or
+                            (trans_vel is not None and trans_vel > FAST_MOTION_FRACTION * TRANSLATION_THRESHOLD)):
+                        any_fast = True
 
  
 
                     prev_rvecs[fi] = rvec.copy()
                     prev_tvecs[fi] = tvec.copy()
+                    prev_eulers[fi] = euler
                     prev_time = now
 
                 # Collision detection (requires at least two faces)
                 is_collision_now = False
                 if len(detections) >= 2:
-                    max_iou = 0.0
-                    best_pair = None
-                    for i in range(len(detections)):
-                        for j in range(i+1, len(detections)):
-                            iou = compute_iou(detections[i]['bbox'], detections[j]['bbox'])
-                            if iou > max_iou:
-                                max_iou = iou
-                                best_pair = (i, j)
+                    iou = pairwise_iou([d['bbox'] for d in detections])
+                    # only pairs i < j; a box always overlaps itself
+                    iou = np.triu(iou, k=1)
+                    a, b = np.unravel_index(iou.argmax(), iou.shape)
+                    max_iou = float(iou[a, b])
+                    best_pair = (int(a), int(b)) if max_iou > 0.0 else None
 
                     if best_pair is not None and max_iou >= COLLISION_IOU_THRESHOLD:
                         a, b = best_pair
                         t1 = detections[a]['tvec']
                         t2 = detections[b]['tvec']
-                        zdiff = abs(float(t1[2] - t2[2]))
-                        d3 = float(np.linalg.norm((t1 - t2).ravel()))
-                        is_close3d = (zdiff < DEPTH_DIFF_MAX) and (d3 < DIST_3D_MAX)
+                        zdiff = abs(float(t1[2, 0] - t2[2, 0]))
+                        # compare squared distances to skip the sqrt
+                        is_close3d = (zdiff < DEPTH_DIFF_MAX) and (_dist3_sq(t1, t2) < DIST_3D_MAX_SQ)
                         is_collision_now = is_close3d
 
                 # Temporal confirmation
@@ -481,30 +850,35 @@ try:
                 # Count one per continuous contact
                 if confirmed and not currently_overlapping:
                     collision_count += 1
-                    # start and immediately finalize a pre-event-only collision clip
-                    if not clip_active:
-                        if _start_collision_clip(now, (w, h)):
-                            _finish_collision_clip()
+                    # queue a pre-event-only collision clip for the clip writer thread
+                    _start_collision_clip(now, (w, h))
                 currently_overlapping = confirmed
 
                 # overlay collision status and count
-                cv2.putText(frame, f"Collisions: {collision_count}", (10, 20), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255,255,255), 1)
+                cv2.putText(frame, "Collisions: %d" % collision_count, (10, 20), FONT, 0.6, (255,255,255), 1)
                 status_text = "Collision: YES" if is_collision_now else "Collision: NO"
                 status_color = (0,0,255) if is_collision_now else (0,200,0)
-                cv2.putText(frame, status_text, (10, 40), cv2.FONT_HERSHEY_SIMPLEX, 0.6, status_color, 2)
+                cv2.putText(frame, status_text, (10, 40), FONT, 0.6, status_color, 2)
                 if is_collision_now:
                     cv2.rectangle(frame, (0,0), (w-1,h-1), (0,0,255), 3)
 
+        if any_fast:
+            fast_motion.set()
+        else:
+            fast_motion.clear()
+
         # After overlays are drawn, push frame into prebuffer for pre-event clips
-        prebuffer.append((now, frame.copy()))
-        max_pre_frames = int(max(1, int(CLIP_PRE_SECONDS * clip_fps)))
-        while len(prebuffer) > max_pre_frames:
-            prebuffer.popleft()
+        np.copyto(prebuffer_frames[prebuffer_head], frame)
+        prebuffer_ts[prebuffer_head] = now
+        prebuffer_head = (prebuffer_head + 1) % PREBUFFER_LEN
+        prebuffer_size = min(prebuffer_size + 1, PREBUFFER_LEN)
+        _flush_pending_clip()  # a clip that found the clip writer busy
 
         # show
         cv2.imshow("Collision Detector", frame)
         if SAVE_VIDEO:
-            out.write(frame)
+            # each captured frame is a fresh array and is not drawn on after this point
+            _put_drop_oldest(video_q, frame)
 
         # No post-event writing; clips are finalized immediately after trigger
 
@@ -513,13 +887,27 @@ try:
             break
 
 finally:
+    stop_event.set()
+    capture_thread.join(timeout=1.0)
+    inference_thread.join(timeout=1.0)
     cap.release()
-    if SAVE_VIDEO: out.release()
+    if SAVE_VIDEO:
+        # finish encoding what is queued before closing the file
+        video_q.put(None)
+        video_thread.join()
+        out.release()
     cv2.destroyAllWindows()
-    # Ensure clip writer is closed
-    try:
-        if clip_writer is not None:
-            clip_writer.release()
-    except Exception:
-        pass
-    face_mesh.close()
\ No newline at end of file
+    # Let queued collision clips finish writing
+    if _pending_clip is not None and not _flush_pending_clip(timeout=5.0):
+        print("Collision clip dropped: the clip writer did not finish the previous clip")
+    clip_q.put(None)
+    clip_thread.join()
+    if MESH_PROCESS:
+        _mesh_worker.stdin.close()  # EOF ends the worker loop
+        try:
+            _mesh_worker.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            _mesh_worker.kill()
+        _rgb_shm.unlink()
+    else:
+        face_mesh.close()
\ No newline at end of file
@@ -0,0 +1,111 @@
+"""
+FaceMesh worker process for collision_detector.py (--mesh-process)
+Runs MediaPipe face mesh in its own process so inference does not share a GIL with
+capture and drawing. Frames are read straight from the detector's shared-memory
+RGB buffers; only small messages cross the pipes:
+  request  (stdin):  uint32 buffer slot
+  response (stdout): uint32 slot echoed back, uint32 face count, then per face uint32
+                     landmark count followed by that many float32 (x, y) pairs, normalized
+stdout carries nothing but responses: everything else this process prints goes to stderr
+"""
+
+import os
+import struct
+import sys
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# protobuf wire layout of one NormalizedLandmark that carries only x, y, z (what
+# FaceMesh emits): 0x0a <len=15> 0x0d <x f32> 0x15 <y f32> 0x1d <z f32>
+_LM_RECORD = np.dtype([('tag', 'u1'), ('len', 'u1'),
+                       ('tx', 'u1'), ('x', '<f4'), ('ty', 'u1'), ('y', '<f4'), ('tz', 'u1'), ('z', '<f4')])
+_LM_HEADER = np.array([(0x0a, 15, 0x0d, 0, 0x15, 0, 0x1d, 0)], dtype=_LM_RECORD)
+
+def landmarks_to_array(face_landmarks):
+    # normalized (N, 2) float32 landmark (x, y); one serialize call + frombuffer instead
+    # of 2 attribute reads per landmark, used only when every record has the fixed
+    # layout above, else fall back to the walk
+    lms = face_landmarks.landmark
+    buf = face_landmarks.SerializeToString()
+    if len(buf) == _LM_RECORD.itemsize * len(lms):
+        rec = np.frombuffer(buf, dtype=_LM_RECORD)
+        if all((rec[f] == _LM_HEADER[f]).all() for f in ('tag', 'len', 'tx', 'ty', 'tz')):
+            return np.stack((rec['x'], rec['y']), axis=1)
+    return np.fromiter((v for lm in lms for v in (lm.x, lm.y)),
+                       dtype=np.float32, count=2 * len(lms)).reshape(-1, 2)
+
+def read_exact(stream, n):
+    data = stream.read(n)
+    if len(data) != n:
+        raise EOFError("face mesh worker exited")
+    return data
+
+def write_reply(stream, slot, faces):
+    parts = [struct.pack('<II', slot, len(faces))]
+    for pts in faces:
+        parts.append(struct.pack('<I', len(pts)))
+        parts.append(pts.tobytes())
+    stream.write(b''.join(parts))
+    stream.flush()
+
+def read_reply(stream):
+    # (slot, [normalized (N, 2) float32 per face]); EOFError once the worker is gone
+    slot, count = struct.unpack('<II', read_exact(stream, 8))
+    faces = []
+    for _ in range(count):
+        (n,) = struct.unpack('<I', read_exact(stream, 4))
+        faces.append(np.frombuffer(read_exact(stream, n * 8), dtype=np.float32).reshape(n, 2))
+    return slot, faces
+
+def _attach(name):
+    # the detector owns (and unlinks) the segment; this process must not
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python >= 3.13
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        try:
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+        return shm
+
+def main():
+    # keep a private copy of fd 1 for the responses, then point fd 1 and sys.stdout at
+    # stderr, so a stray print here or native logging from mediapipe cannot corrupt them
+    responses = os.fdopen(os.dup(sys.stdout.fileno()), 'wb')
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    sys.stdout = sys.stderr
+
+    import mediapipe as mp
+
+    shm_name = sys.argv[1]
+    slots, frame_h, frame_w, max_faces = (int(a) for a in sys.argv[2:6])
+    shm = _attach(shm_name)
+    frames = np.ndarray((slots, frame_h, frame_w, 3), dtype=np.uint8, buffer=shm.buf)
+    # same settings as the detector's in-process FaceMesh
+    face_mesh = mp.solutions.face_mesh.FaceMesh(static_image_mode=False,
+                                                max_num_faces=max_faces,
+                                                refine_landmarks=False,
+                                                min_detection_confidence=0.5,
+                                                min_tracking_confidence=0.5)
+    requests = sys.stdin.buffer
+    try:
+        while True:
+            req = requests.read(4)
+            if len(req) < 4:
+                break  # detector closed the pipe
+            (slot,) = struct.unpack('<I', req)
+            frame = frames[slot]
+            frame.flags.writeable = False  # lets MediaPipe skip its defensive copy
+            results = face_mesh.process(frame)
+            write_reply(responses, slot, [landmarks_to_array(fl)
+                                          for fl in results.multi_face_landmarks or ()])
+    finally:
+        face_mesh.close()
+        del frames
+        shm.close()
+
+if __name__ == "__main__":
+    main()
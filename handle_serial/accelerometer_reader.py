@@ -1,11 +1,11 @@
-import serial
-import serial.tools.list_ports
 import re
-import requests
-import json
+import logging
+import sys
 import numpy as np
-from datetime import datetime
 import time
+import http_client
+from http_client import post_event, enqueue_event, utc_timestamp
+from serial_io import list_available_ports, get_serial_connection, read_serial_lines
 
 # Import configuration
 try:
@@ -24,101 +24,45 @@ except ImportError:
     BAUDRATE = 38400
     MAGNITUDE_SCALE = 100
 
-def list_available_ports():
-    """List all available serial ports"""
-    ports = serial.tools.list_ports.comports()
-    available_ports = []
-    for port in ports:
-        available_ports.append(port.device)
-        print(f"Found port: {port.device} - {port.description}")
-    return available_ports
+# Alert threshold in raw sensor units, so each sample is compared without a division
+# (rounded to undo float error such as 2.3 * 100 == 229.99999999999997)
+_THRESHOLD_RAW = round(THRESHOLD * MAGNITUDE_SCALE, 6)
 
-def get_serial_connection(port=None, baudrate=38400):
-    """Establish serial connection with error handling"""
-    if port is None:
-        # Auto-detect available ports
-        available_ports = list_available_ports()
-        if not available_ports:
-            print("No serial ports found!")
-            return None
-        
-        # Use the first available port
-        port = available_ports[0]
-        print(f"Using port: {port}")
-    
-    try:
-        ser = serial.Serial(port=port, baudrate=baudrate, timeout=1)
-        print(f"Successfully connected to {port} at {baudrate} baud")
-        return ser
-    except serial.SerialException as e:
-        print(f"Failed to connect to {port}: {e}")
-        return None
+# Cooldown in integer nanoseconds of time.monotonic_ns(), immune to wall-clock jumps
+ALERT_COOLDOWN_NS = int(ALERT_COOLDOWN * 1_000_000_000)
+
+http_client.configure(DATABASE_URL, API_KEY, PLAYER_NAME, TEAM_NAME)
+
+log = logging.getLogger("accel")
+
+# Compiled once; applied to raw serial bytes so lines never need decoding
+_MAG_RE = re.compile(rb'MAG:\s*(-?\d+)')
 
 def parse_accel_data(line):
-    """Parse data from line like 'MAG: 1234'"""
-    match = re.search(r'MAG:\s*(-?\d+)', line)
+    """Parse data from a raw serial line like b'MAG: 1234'"""
+    # Cheap prefix check rejects non-data lines before touching the regex engine
+    if not line.startswith(b'MAG:'):
+        return None
+    match = _MAG_RE.match(line)
     if match:
         return int(match.group(1))
     return None
 
-def send_to_database(magnitude, hit_count):
-    """Send accelerometer event to database in the correct format"""
+def build_event_payload(magnitude):
+    """Build the API payload for a single accelerometer reading"""
     
     # Convert magnitude to G-force (acceleration in Gs)
     acceleration_g = magnitude / MAGNITUDE_SCALE
     
-    # Prepare data payload in the exact format required by your API
-    payload = {
-        "playerName": PLAYER_NAME,
-        "team": TEAM_NAME,
-        "occurredAt": datetime.now().strftime("%Y-%m-%dT%H:%M:%SZ"),  # ISO 8601 format
+    # Per-event fields of the API payload; playerName/team are added by http_client
+    return {
+        "occurredAt": utc_timestamp(),  # ISO 8601 format
         "accelerationG": acceleration_g
     }
-    
-    # HTTP headers as specified in your curl command
-    headers = {
-        "Content-Type": "application/json",
-        "x-api-key": API_KEY
-    }
-    
-    try:
-        # Send POST request to your database API
-        response = requests.post(DATABASE_URL, json=payload, headers=headers, timeout=10)
-        
-        if response.status_code in [200, 201]:
-            print(f"✓ Event sent to database: {PLAYER_NAME} - {acceleration_g:.1f}G")
-            return True
-        else:
-            print(f"✗ Database error: {response.status_code} - {response.text}")
-            return False
-            
-    except requests.exceptions.RequestException as e:
-        print(f"✗ Network error sending to database: {e}")
-        return False
-    except Exception as e:
-        print(f"✗ Unexpected error: {e}")
-        return False
 
-def send_threshold_alert(magnitude, hit_count, threshold):
-    """Send event to database when threshold is exceeded (uses same format as send_to_database)"""
-    print(f"� THRESHOLD EXCEEDED! Sending to database...")
-    return send_to_database(magnitude, hit_count)
-        # Send POST request to your database API
-        response = requests.post(DATABASE_URL, json=payload, headers=headers, timeout=10)
-        
-        if response.status_code in [200, 201]:
-            print(f"✓ Event sent to database: {PLAYER_NAME} - {acceleration_g:.1f}G")
-            return True
-        else:
-            print(f"✗ Database error: {response.status_code} - {response.text}")
-            return False
-            
-    except requests.exceptions.RequestException as e:
-        print(f"✗ Network error sending to database: {e}")
-        return False
-    except Exception as e:
-        print(f"✗ Unexpected error: {e}")
-        return False
+def send_to_database(magnitude, hit_count):
+    """Send accelerometer event to database in the correct format"""
+    return post_event(build_event_payload(magnitude))
 
 def send_threshold_alert(magnitude, hit_count, threshold):
     """Send event to database when threshold is exceeded (uses same format as send_to_database)"""
@@ -151,56 +95,59 @@ def main():
     # Variables to store magnetometer data
     hit_count = 0  # Hit tracker
     alert_count = 0  # Alert counter
-    last_alert_time = 0  # Cooldown tracking
+    next_alert_ns = 0  # Cooldown tracking: monotonic_ns() before which no new alert fires
     
     try:
         print("Listening for accelerometer data...")
         print("Press Ctrl+C to exit")
         print("-" * 50)
         
+        buf = bytearray()  # serial bytes not yet split into lines
         while True:
-            # Read a line from the serial port
-            line = ser.readline().decode('utf-8').rstrip()
-            if line:
+            # Pull everything the port has buffered in one call, then handle each
+            # complete line (parsed as bytes, no decode)
+            for line in read_serial_lines(ser, buf):
                 # Parse the accelerometer value
                 magnitude_new = parse_accel_data(line)
             
                 if magnitude_new is not None:
                     hit_count += 1  # Increment hit counter
-                    magnitude_scaled = magnitude_new / MAGNITUDE_SCALE  # Scale the magnitude (G-force)
                     
-                    # Display magnitude
-                    print(f"Hit #{hit_count}: Magnitude = {magnitude_scaled:.2f}G", end="")
+                    # Magnitude is scaled to G-force only for display; each sample is
+                    # logged as one record rather than several print() calls
+                    magnitude_g = magnitude_new / MAGNITUDE_SCALE
                     
-                    # Check if magnitude exceeds threshold
-                    if magnitude_scaled > THRESHOLD:
+                    # Check if magnitude exceeds threshold (raw integer vs precomputed raw threshold)
+                    if magnitude_new > _THRESHOLD_RAW:
                         # Check cooldown period
-                        current_time = time.time()
-                        if current_time - last_alert_time >= ALERT_COOLDOWN:
+                        now_ns = time.monotonic_ns()
+                        if now_ns >= next_alert_ns:
                             alert_count += 1
-                            print(f" 🚨 THRESHOLD EXCEEDED! (Alert #{alert_count})")
+                            log.info("Hit #%d: Magnitude = %.2fG 🚨 THRESHOLD EXCEEDED! (Alert #%d)",
+                                     hit_count, magnitude_g, alert_count)
                             
-                            # Send threshold alert automatically
-                            success = send_threshold_alert(magnitude_new, hit_count, THRESHOLD)
-                            if success:
-                                print(f"   ✅ Event sent to database successfully")
-                            else:
-                                print(f"   ❌ Failed to send event")
+                            # Send threshold alert in the background so reading continues
+                            if enqueue_event(build_event_payload(magnitude_new), urgent=True):
+                                log.info("   📤 Event queued for database")
                             
-                            last_alert_time = current_time
+                            next_alert_ns = now_ns + ALERT_COOLDOWN_NS
                         else:
-                            cooldown_remaining = ALERT_COOLDOWN - (current_time - last_alert_time)
-                            print(f" ⚠️ Threshold exceeded (cooldown: {cooldown_remaining:.1f}s)")
+                            cooldown_remaining = (next_alert_ns - now_ns) / 1e9
+                            log.info("Hit #%d: Magnitude = %.2fG ⚠️ Threshold exceeded (cooldown: %.1fs)",
+                                     hit_count, magnitude_g, cooldown_remaining)
                     else:
-                        print("")  # Normal reading
+                        log.info("Hit #%d: Magnitude = %.2fG", hit_count, magnitude_g)  # Normal reading
                     
                     # Optional: Send all data to database (not just threshold alerts)
                     if SEND_ALL_DATA:
-                        send_to_database(magnitude_new, hit_count)
+                        enqueue_event(build_event_payload(magnitude_new))
                     
-                    print("-" * 50)
+                    log.info("-" * 50)
                 
     except KeyboardInterrupt:
+        # Give events still in the send queue a moment to reach the database
+        if not http_client.flush():
+            print("\n⚠️ Some queued events could not be sent before exit")
         print(f"\n=== Session Summary ===")
         print(f"Total hits recorded: {hit_count}")
         print(f"Threshold alerts sent: {alert_count}")
@@ -211,6 +158,7 @@ def main():
         print("Serial connection closed.")
 
 if __name__ == "__main__":
-    # Import time for cooldown functionality
-    import time
+    # stdout is block-buffered when redirected to a file, so sample logging
+    # costs far fewer write() calls than line-flushed print()
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stdout)
     main()
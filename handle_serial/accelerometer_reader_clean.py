@@ -6,12 +6,17 @@ Configured for your specific API format
 """
 
 import serial
-import serial.tools.list_ports
 import re
-import requests
-import json
+import logging
+import os
+import sys
 import time
-from datetime import datetime
+import threading
+from collections import deque
+import numpy as np
+import http_client
+from http_client import post_event, enqueue_event, utc_timestamp
+from serial_io import list_available_ports, get_serial_connection, read_serial_lines
 
 # Text-to-speech import
 try:
@@ -21,6 +26,17 @@ except ImportError:
     print("Warning: pyttsx3 not installed. Text-to-speech disabled.")
     TTS_AVAILABLE = False
 
+log = logging.getLogger("accel")
+
+class _DeferredFlushHandler(logging.StreamHandler):
+    """StreamHandler that leaves flushing to its caller; the main loop flushes once
+    per batch of samples instead of once per record (each flush is a console write)"""
+    def flush(self):
+        pass
+
+# Verbose request/response logging (config.py may set DEBUG = True)
+DEBUG = False
+
 # Import configuration
 try:
     from config import *
@@ -41,115 +57,145 @@ except ImportError:
     MAGNITUDE_SCALE = 100
     GYROSCOPE_SCALE = 100  # Scale factor for gyroscope data (adjust as needed)
 
-def speak_alert(player_name, acceleration_g):
-    """Text-to-speech alert when a hit is recorded"""
-    if not TTS_AVAILABLE:
-        print("  🔇 Text-to-speech not available")
-        return
-    
+# Thresholds in raw sensor units, so each sample is compared without a division
+# (rounded to undo float error such as 2.3 * 100 == 229.99999999999997)
+_G_THRESH_RAW = round(THRESHOLD_G * MAGNITUDE_SCALE, 6)
+_PRINT_WORTHY_RAW = round(PRINT_WORTHY_THRESHOLD_G * MAGNITUDE_SCALE, 6)
+_GYRO_THRESH_RAW = round(THRESHOLD_GYRO * GYROSCOPE_SCALE, 6)
+
+http_client.configure(DATABASE_URL, API_KEY, PLAYER_NAME, TEAM_NAME)
+
+# One text-to-speech engine for the whole session, created and driven by its own
+# thread so alerts never stall the serial loop on driver start-up or runAndWait().
+# At most one unspoken message is kept per kind of alert: a newer one replaces it,
+# so a burst of alerts cannot build a backlog of stale warnings
+_tts_pending = {}  # kind -> newest unspoken message, in the order they were queued
+_tts_ready = threading.Condition()
+_tts_thread = None
+
+def _tts_worker():
+    """Background worker: start the engine, then speak queued alert messages one at a time.
+    The engine is created here, not at import, because pyttsx3's SAPI5 driver is bound
+    to the thread that initialised it; it is also the only thread that ever uses it."""
+    global TTS_AVAILABLE
     try:
-        # Create the alert message
-        message = f"Player 67, {player_name} has had a hit to the head of {acceleration_g:.1f} G, please remove him from the field"
-        
-        print(f"  🔊 Speaking alert: {message}")
-        
-        # Initialize text-to-speech engine
+        if sys.platform == "win32":
+            # SAPI5 is a COM server, and a new thread has no COM apartment until it joins one
+            try:
+                import pythoncom
+                pythoncom.CoInitialize()
+            except ImportError:
+                import comtypes  # installed with pyttsx3 on Windows
+                comtypes.CoInitialize()
         engine = pyttsx3.init()
-        
-        # Optional: Adjust speech rate and volume
         engine.setProperty('rate', 150)    # Speed of speech
         engine.setProperty('volume', 0.9)  # Volume (0.0 to 1.0)
-        
-        # Speak the message
-        engine.say(message)
-        engine.runAndWait()
-        
-        print("  ✅ Alert spoken successfully")
-        
     except Exception as e:
-        print(f"  ❌ Text-to-speech error: {e}")
+        # the traceback says which driver or COM call failed
+        log.error("  ❌ Text-to-speech engine failed to start (%s: %s), text-to-speech disabled",
+                  type(e).__name__, e, exc_info=True)
+        TTS_AVAILABLE = False
+        return
+    
+    while True:
+        with _tts_ready:
+            while not _tts_pending:
+                _tts_ready.wait()
+            message = _tts_pending.pop(next(iter(_tts_pending)))
+        try:
+            engine.say(message)
+            engine.runAndWait()
+            log.info("  ✅ Alert spoken successfully")
+        except Exception as e:
+            log.error("  ❌ Text-to-speech error: %s", e)
+
+def _queue_speech(kind, message):
+    """Queue a message for the speech thread, starting it on the first alert.
+    Replaces any message of the same kind that has not been spoken yet."""
+    global _tts_thread
+    if _tts_thread is None:
+        _tts_thread = threading.Thread(target=_tts_worker, name="tts", daemon=True)
+        _tts_thread.start()
+    with _tts_ready:
+        if _tts_pending.pop(kind, None) is not None:
+            log.info("  🔇 Replacing an unspoken %s alert with the newer one", kind)
+        _tts_pending[kind] = message
+        _tts_ready.notify()
+
+def speak_alert(player_name, acceleration_g):
+    """Text-to-speech alert when a hit is recorded (queued, returns immediately)"""
+    if not TTS_AVAILABLE:
+        print("  🔇 Text-to-speech not available")
+        return
+    
+    # Create the alert message
+    message = f"Player 67, {player_name} has had a hit to the head of {acceleration_g:.1f} G, please remove him from the field"
+    
+    log.info("  🔊 Speaking alert: %s", message)
+    _queue_speech("g_force", message)
 
 def speak_angular_alert(player_name, angular_velocity):
-    """Text-to-speech alert when angular velocity threshold is exceeded"""
+    """Text-to-speech alert when angular velocity threshold is exceeded (queued, returns immediately)"""
     if not TTS_AVAILABLE:
         print("  🔇 Text-to-speech not available")
         return
     
-    try:
-        # Create the angular velocity alert message
-        message = f"Warning! Player 67, {player_name} has excessive head rotation of {abs(angular_velocity):.1f} degrees per second. Monitor for potential concussion signs."
-        
-        print(f"  🔊 Speaking angular alert: {message}")
-        
-        # Initialize text-to-speech engine
-        engine = pyttsx3.init()
-        
-        # Optional: Adjust speech rate and volume
-        engine.setProperty('rate', 150)    # Speed of speech
-        engine.setProperty('volume', 0.9)  # Volume (0.0 to 1.0)
-        
-        # Speak the message
-        engine.say(message)
-        engine.runAndWait()
-        
-        print("  ✅ Angular alert spoken successfully")
-        
-    except Exception as e:
-        print(f"  ❌ Text-to-speech error: {e}")
+    # Create the angular velocity alert message
+    message = f"Warning! Player 67, {player_name} has excessive head rotation of {abs(angular_velocity):.1f} degrees per second. Monitor for potential concussion signs."
+    
+    log.info("  🔊 Speaking angular alert: %s", message)
+    _queue_speech("angular", message)
 
-def list_available_ports():
-    """List all available serial ports"""
-    ports = serial.tools.list_ports.comports()
-    available_ports = []
-    for port in ports:
-        available_ports.append(port.device)
-        print(f"Found port: {port.device} - {port.description}")
-    return available_ports
+SAMPLE_BUFFER = 256  # raw lines held between the reader thread and the main loop
+IMPACT_DEBOUNCE = 0.15  # seconds without a further G-force crossing before an impact alert fires
+IMPACT_MAX_WAIT = 0.5   # ...but never later than this after the impact's first crossing
 
-def get_serial_connection(port=None, baudrate=38400):
-    """Establish serial connection with error handling"""
-    if port is None:
-        # Auto-detect available ports
-        available_ports = list_available_ports()
-        if not available_ports:
-            print("No serial ports found!")
-            return None
-        
-        # Use the first available port
-        port = available_ports[0]
-        print(f"Using port: {port}")
-    
-    try:
-        ser = serial.Serial(port=port, baudrate=baudrate, timeout=1)
-        print(f"Successfully connected to {port} at {baudrate} baud")
-        return ser
-    except serial.SerialException as e:
-        print(f"Failed to connect to {port}: {e}")
-        return None
+def _serial_reader(ser, samples, have_samples, stop):
+    """Background worker: keep draining the port into samples so nothing the sensor
+    sends is lost while the main loop is busy. When the deque is full the oldest line
+    is dropped, so the main loop always sees the freshest readings."""
+    buf = bytearray()  # serial bytes not yet split into lines
+    while not stop.is_set():
+        try:
+            lines = read_serial_lines(ser, buf)
+        except serial.SerialException as e:
+            print(f"Serial read failed: {e}")
+            break
+        if lines:
+            samples.extend(lines)
+            have_samples.set()
+
+# Compiled once; applied to raw serial bytes so lines never need decoding
+_MAG_RE = re.compile(rb'MAG:\s*(-?\d+)')
+_LINE_RE = re.compile(rb'(MAG(?:_GY)?):\s*(-?\d+)')  # either reading, told apart by group(1)
 
 def parse_sensor_data(line):
-    """Parse data from lines containing either G-force (MAG:) or Gyroscope (GYRO:) data"""
-    # Check for G-force data
-    mag_match = re.search(r'MAG:\s*(-?\d+)', line)
-    if mag_match:
-        return 'g_force', int(mag_match.group(1))
-    
-    # Check for Gyroscope data
-    gyro_match = re.search(r'MAG_GY:\s*(-?\d+)', line)
-    if gyro_match:
-        return 'gyroscope', int(gyro_match.group(1))
+    """Parse a raw serial line holding either G-force (MAG:) or gyroscope (MAG_GY:) data"""
+    # Fast path: the firmware sends one value per line, so a prefix check and
+    # int() (which ignores surrounding whitespace) avoid the regex engine entirely
+    try:
+        if line.startswith(b'MAG_GY:'):
+            return 'gyroscope', int(line[7:])
+        if line.startswith(b'MAG:'):
+            return 'g_force', int(line[4:])
+    except ValueError:
+        pass
     
-    return None, None
+    # Slow path for lines with surrounding noise: one regex pass finds either reading
+    match = _LINE_RE.search(line)
+    if not match:
+        return None, None
+    return ('gyroscope' if match.group(1) == b'MAG_GY' else 'g_force'), int(match.group(2))
 
 def parse_accel_data(line):
-    """Legacy function - parse data from line like 'MAG: 1234' (kept for backward compatibility)"""
-    match = re.search(r'MAG:\s*(-?\d+)', line)
+    """Legacy function - parse data from a raw line like b'MAG: 1234' (kept for backward compatibility)"""
+    match = _MAG_RE.search(line)
     if match:
         return int(match.group(1))
     return None
 
-def send_to_database(magnitude, hit_count, gyro_data=None):
-    """Send accelerometer event to database in your exact API format"""
+def build_event_payload(magnitude, gyro_data=None):
+    """Build the API payload for one G-force (and optional gyroscope) reading"""
     
     # Convert magnitude to G-force (acceleration in Gs)
     acceleration_g = magnitude / MAGNITUDE_SCALE
@@ -157,51 +203,16 @@ def send_to_database(magnitude, hit_count, gyro_data=None):
     # Convert gyroscope data to angular velocity (if available)
     angular_velocity = gyro_data / GYROSCOPE_SCALE if gyro_data is not None else 0
     
-    # Prepare data payload in the exact format required by your API
-    payload = {
-        "playerName": PLAYER_NAME,
-        "team": TEAM_NAME,
-        "occurredAt": datetime.now().strftime("%Y-%m-%dT%H:%M:%SZ"),  # ISO 8601 format
+    # Per-event fields of the API payload; playerName/team are added by http_client
+    return {
+        "occurredAt": utc_timestamp(),  # ISO 8601 format
         "accelerationG": acceleration_g,
         "angularVelocity": angular_velocity
     }
-    
-    # HTTP headers as specified in your curl command
-    headers = {
-        "Content-Type": "application/json",
-        "x-api-key": API_KEY
-    }
-    
-    print(f"  📡 Sending to database: {acceleration_g:.1f}G...")
-    print(f"  URL: {DATABASE_URL}")
-    print(f"  Payload: {json.dumps(payload, indent=2)}")
-    
-    try:
-        # Send POST request to your database API
-        response = requests.post(DATABASE_URL, json=payload, headers=headers, timeout=10)
-        
-        print(f"  Status Code: {response.status_code}")
-        print(f"  Response Headers: {dict(response.headers)}")
-        print(f"  Response Body: {response.text}")
-        
-        if response.status_code in [200, 201]:
-            print(f"  ✅ SUCCESS! Event sent to database: {PLAYER_NAME} - {acceleration_g:.1f}G")
-            return True
-        else:
-            print(f"  ❌ FAILED: HTTP {response.status_code}")
-            print(f"  Response: {response.text}")
-            return False
-            
-    except requests.exceptions.ConnectionError as e:
-        print(f"  ❌ CONNECTION ERROR: {e}")
-        print(f"  Make sure you have internet connection to reach {DATABASE_URL}")
-        return False
-    except requests.exceptions.RequestException as e:
-        print(f"  ❌ REQUEST ERROR: {e}")
-        return False
-    except Exception as e:
-        print(f"  ❌ UNEXPECTED ERROR: {e}")
-        return False
+
+def send_to_database(magnitude, hit_count, gyro_data=None):
+    """Send accelerometer event to database in your exact API format"""
+    return post_event(build_event_payload(magnitude, gyro_data))
 
 def test_database_connection():
     """Test database connection before starting serial monitoring"""
@@ -221,6 +232,128 @@ def test_database_connection():
         print("Please check your internet connection and database URL.")
         return False
 
+_PRIORITY_MSG = {
+    "dangerous_hit": "🚨 DANGEROUS HIT",
+    "g_force": "⚠️ G-FORCE EVENT",
+    "angular": "🔄 ANGULAR EVENT",
+    "all_data": "📊 DATA LOG"
+}
+
+def send_alert_event(alert_type, g_force_raw, gyro_raw):
+    """Queue one sensor pair for the database with its priority label; returns True if queued"""
+    priority_msg = _PRIORITY_MSG.get(alert_type, "📊 EVENT")
+    log.info("  📡 Sending %s: G=%.2fG, Angular=%.2f deg/s", priority_msg,
+             g_force_raw / MAGNITUDE_SCALE, gyro_raw / GYROSCOPE_SCALE)
+    # POST happens on the sender thread so the next samples are read immediately;
+    # routine SEND_ALL_DATA logs may be batched, alerts go out right away
+    if enqueue_event(build_event_payload(g_force_raw, gyro_raw), urgent=(alert_type != "all_data")):
+        log.info("  📤 %s queued for database", priority_msg)
+        return True
+    return False
+
+class AlertTracker:
+    """Alert timing for complete sensor pairs, kept apart from the serial loop; callers
+    pass time.monotonic() as now. The G-force crossings of one impact collapse into a
+    single alert carrying their peak, due IMPACT_DEBOUNCE after the last crossing but
+    capped at IMPACT_MAX_WAIT after the first, so sustained or oscillating high readings
+    cannot hold it back. An impact only ends once crossings stop for IMPACT_DEBOUNCE, so
+    a stuck-high sensor alerts once rather than every IMPACT_MAX_WAIT. Angular-only alerts fire at most once per ALERT_COOLDOWN so a
+    single head rotation is not announced once per sample."""
+    
+    def __init__(self):
+        self.peak_g_raw = None       # highest raw G-force of the impact in progress, until alerted
+        self.peak_gyro_raw = 0       # largest raw angular velocity seen during it
+        self.peak_deadline = 0       # monotonic time its alert is due
+        self.impact_started = 0      # monotonic time of its first crossing
+        self.last_crossing = float('-inf')  # monotonic time of the latest G-force crossing
+        self.next_angular_alert = 0  # monotonic time before which angular-only alerts are skipped
+    
+    def on_pair(self, g_force_raw, gyro_raw, now):
+        """Classify one pair: 'impact_start' / 'impact' (G-force crossing, alert deferred
+        until impact_due), 'angular' (alert now), 'angular_cooldown' or 'normal'"""
+        if g_force_raw > _G_THRESH_RAW:
+            # Part of an impact: hold the alert until its peak has passed
+            started = now >= self.last_crossing + IMPACT_DEBOUNCE
+            self.last_crossing = now
+            if started:
+                self.peak_g_raw, self.peak_gyro_raw = g_force_raw, gyro_raw
+                self.impact_started = now
+            elif self.peak_g_raw is None:
+                # alerted at IMPACT_MAX_WAIT and still going: same impact, no new alert
+                return 'impact'
+            else:
+                self.peak_g_raw = max(self.peak_g_raw, g_force_raw)
+                if abs(gyro_raw) > abs(self.peak_gyro_raw):
+                    self.peak_gyro_raw = gyro_raw
+            self.peak_deadline = min(self.impact_started + IMPACT_MAX_WAIT, now + IMPACT_DEBOUNCE)
+            return 'impact_start' if started else 'impact'
+        if abs(gyro_raw) > _GYRO_THRESH_RAW:
+            if now < self.next_angular_alert:
+                return 'angular_cooldown'
+            self.next_angular_alert = now + ALERT_COOLDOWN
+            return 'angular'
+        return 'normal'
+    
+    def impact_due(self, now):
+        """Return (peak G-force raw, peak gyroscope raw) once the impact in progress is due to alert, else None"""
+        if self.peak_g_raw is None or now < self.peak_deadline:
+            return None
+        peak = (self.peak_g_raw, self.peak_gyro_raw)
+        self.peak_g_raw = None
+        return peak
+    
+    def wait_timeout(self, now, idle):
+        """How long the loop may sleep: idle, or until the pending impact alert is due"""
+        if self.peak_g_raw is None:
+            return idle
+        return max(0.0, self.peak_deadline - now)
+
+def alert_impact(peak_g_raw, peak_gyro_raw):
+    """Speak and queue the alert for one finished impact; returns True if its event was queued"""
+    magnitude_g = peak_g_raw / MAGNITUDE_SCALE
+    gyro_value = peak_gyro_raw / GYROSCOPE_SCALE
+    
+    if abs(peak_gyro_raw) > _GYRO_THRESH_RAW:
+        # Both thresholds exceeded - G-force takes priority as "dangerous hit"
+        alert_type = "dangerous_hit"
+        log.info("  🚨🚨 DANGEROUS HIT DETECTED! 🚨🚨")
+        log.info("      G-Force: %.2fG > %sG threshold", magnitude_g, THRESHOLD_G)
+        log.info("      Angular: %.2f deg/s > %s deg/s threshold", gyro_value, THRESHOLD_GYRO)
+        log.info("      Priority: G-FORCE (Head Impact)")
+        
+        # G-force alert takes priority for dangerous hits
+        # (speech is queued, so the angular alert follows it in order)
+        speak_alert(PLAYER_NAME, magnitude_g)
+        speak_angular_alert(PLAYER_NAME, gyro_value)
+        log.info("  ⏱️ Processing dangerous hit alert for 5 seconds (still reading sensors)...")
+    else:
+        # Only G-force threshold exceeded
+        alert_type = "g_force"
+        log.info("  🚨 G-FORCE THRESHOLD EXCEEDED! (peak %.2fG)", magnitude_g)
+        
+        speak_alert(PLAYER_NAME, magnitude_g)
+        log.info("  ⏱️ Processing G-force alert for 5 seconds (still reading sensors)...")
+    
+    queued = send_alert_event(alert_type, peak_g_raw, peak_gyro_raw)
+    log.info("-" * 50)
+    return queued
+
+def print_session_summary(total_readings, hit_count, event_count):
+    """Send what is still queued (bounded wait), then print the end-of-session summary"""
+    # Give events still in the send queue a moment to reach the database
+    if not http_client.flush():
+        print("\n⚠️ Some queued events could not be sent before exit")
+    print(f"\n=== Session Summary ===")
+    print(f"Total sensor readings: {total_readings}")
+    print(f"Qualified hits (≥{PRINT_WORTHY_THRESHOLD_G}G): {hit_count}")
+    print(f"Hit percentage: {(hit_count/total_readings*100):.1f}%" if total_readings > 0 else "Hit percentage: 0.0%")
+    print(f"Database events queued: {event_count}")
+    print(f"Database events sent: {http_client.events_sent()}")
+    print(f"Player: {PLAYER_NAME} ({TEAM_NAME})")
+    print(f"Print Worthy Threshold: {PRINT_WORTHY_THRESHOLD_G}G")
+    print(f"Alert Threshold: {THRESHOLD_G}G")
+    print(f"Angular Threshold: {THRESHOLD_GYRO} deg/s")
+
 def main():
     """Main accelerometer monitoring loop"""
     
@@ -233,10 +366,13 @@ def main():
     print(f"Send all data: {SEND_ALL_DATA}")
     print("=" * 40)
     
-    # Test database connection first
-    if not test_database_connection():
-        print("\n❌ Cannot continue without database connection.")
-        return
+    # The connection test POSTs a real 3.5G event, so it only runs on request
+    if os.environ.get("VERIFY_DB_ON_START") or "--verify" in sys.argv:
+        if not test_database_connection():
+            print("\n❌ Cannot continue without database connection.")
+            return
+    else:
+        http_client.warm_up()
     
     print("\n" + "=" * 40)
     print("Available serial ports:")
@@ -257,13 +393,25 @@ def main():
     # Variables to track data
     hit_count = 0           # Qualified hits (>= 1.5G)
     total_readings = 0      # All G-force readings
-    event_count = 0         # Database events sent
-    last_alert_time = 0
+    event_count = 0         # Database events queued
+    alert_processing_until = 0  # monotonic time when the current alert's processing window ends
     
-    # Variables to track sensor readings - pair them together
-    latest_g_force = None
-    latest_gyroscope = None
-    waiting_for_gyroscope = False  # Flag to track if we're expecting gyroscope data after G-force
+    # Sensor readings are paired: a G-force line waits here as (raw, G) until its
+    # gyroscope line arrives, and is consumed by it, so each pair is handled - and
+    # sent to the database - at most once
+    pending_pair = None
+    
+    # One impact produces several G-force spikes in quick succession; the tracker
+    # collects them so a single alert carrying the peak fires once they stop
+    alerts = AlertTracker()
+    
+    # A reader thread owns the port; this loop only processes what it has collected
+    samples = deque(maxlen=SAMPLE_BUFFER)
+    have_samples = threading.Event()
+    stop_reading = threading.Event()
+    reader = threading.Thread(target=_serial_reader, name="serial-reader",
+                              args=(ser, samples, have_samples, stop_reading), daemon=True)
+    reader.start()
     
     try:
         print("\nListening for accelerometer and gyroscope data...")
@@ -271,145 +419,126 @@ def main():
         print("-" * 50)
         
         while True:
-            # Read a line from the serial port
-            line = ser.readline().decode('utf-8').rstrip()
-            if line:
+            # Read before draining: once the reader has stopped, this pass still
+            # handles every line it collected, then the loop ends
+            reader_alive = reader.is_alive()
+            
+            # Wake when new lines arrive, or periodically so the alert window below is still
+            # checked; sooner if an impact alert is waiting for its debounce to expire
+            have_samples.wait(alerts.wait_timeout(time.monotonic(), 0.5))
+            have_samples.clear()
+            
+            # Impact over (no crossing for IMPACT_DEBOUNCE, or IMPACT_MAX_WAIT reached): alert once with its peak
+            impact = alerts.impact_due(time.monotonic())
+            if impact is not None:
+                if alert_impact(*impact):
+                    event_count += 1
+                alert_processing_until = time.monotonic() + 5
+            
+            # Alerts no longer pause the loop; report when their processing window has passed
+            if alert_processing_until and time.monotonic() >= alert_processing_until:
+                log.info("  ✅ Alert processing complete")
+                alert_processing_until = 0
+            
+            while samples:
+                line = samples.popleft()
                 # Parse the sensor data (could be G-force or gyroscope)
                 data_type, raw_value = parse_sensor_data(line)
             
                 if data_type == 'g_force' and raw_value is not None:
                     total_readings += 1
-                    latest_g_force = raw_value
-                    waiting_for_gyroscope = True  # Set flag to wait for paired gyroscope reading
                     magnitude_g = raw_value / MAGNITUDE_SCALE  # Convert to G-force
+                    pending_pair = (raw_value, magnitude_g)  # Wait for the paired gyroscope reading
                     
                     # Only count as a hit if it meets the print-worthy threshold
-                    if magnitude_g >= PRINT_WORTHY_THRESHOLD_G:
+                    if raw_value >= _PRINT_WORTHY_RAW:
                         hit_count += 1
-                        print(f"Hit #{hit_count}: G-Force {magnitude_g:.2f}G ⭐ (Print Worthy)")
+                        log.info("Hit #%d: G-Force %.2fG ⭐ (Print Worthy)", hit_count, magnitude_g)
                     else:
-                        print(f"Reading #{total_readings}: G-Force {magnitude_g:.2f}G (Below {PRINT_WORTHY_THRESHOLD_G}G threshold)")
+                        log.info("Reading #%d: G-Force %.2fG (Below %sG threshold)", total_readings, magnitude_g, PRINT_WORTHY_THRESHOLD_G)
                 
-                elif data_type == 'gyroscope' and raw_value is not None and waiting_for_gyroscope:
+                elif data_type == 'gyroscope' and raw_value is not None and pending_pair is not None:
                     # Now we have both readings - process them together as a complete pair
-                    latest_gyroscope = raw_value
-                    waiting_for_gyroscope = False
+                    g_force_raw, magnitude_g = pending_pair  # G scaled once when its line arrived
+                    pending_pair = None
                     gyro_value = raw_value / GYROSCOPE_SCALE  # Apply scaling if needed
-                    magnitude_g = latest_g_force / MAGNITUDE_SCALE  # Recalculate for processing
                     
                     # Display both readings together as a pair
-                    print(f"  ↳ Angular Velocity: {gyro_value:.2f} deg/s")
-                    print(f"  📊 Complete Sensor Pair: G-Force={magnitude_g:.2f}G, Angular={gyro_value:.2f} deg/s")
+                    log.info("  ↳ Angular Velocity: %.2f deg/s", gyro_value)
+                    log.info("  📊 Complete Sensor Pair: G-Force=%.2fG, Angular=%.2f deg/s", magnitude_g, gyro_value)
                     
-                    # Check both thresholds
-                    g_threshold_exceeded = magnitude_g > THRESHOLD_G
-                    ang_threshold_exceeded = abs(gyro_value) > THRESHOLD_GYRO
-                    
-                    # Determine alert priority and database send logic
-                    should_send = False
-                    alert_type = "none"
-                    
-                    if g_threshold_exceeded and ang_threshold_exceeded:
-                        # Both thresholds exceeded - G-force takes priority as "dangerous hit"
-                        alert_type = "dangerous_hit"
-                        print(f"  🚨🚨 DANGEROUS HIT DETECTED! 🚨🚨")
-                        print(f"      G-Force: {magnitude_g:.2f}G > {THRESHOLD_G}G threshold")
-                        print(f"      Angular: {gyro_value:.2f} deg/s > {THRESHOLD_GYRO} deg/s threshold")
-                        print(f"      Priority: G-FORCE (Head Impact)")
-                        
-                        current_time = time.time()
-                        if current_time - last_alert_time >= ALERT_COOLDOWN:
-                            should_send = True
-                            last_alert_time = current_time
-                            
-                            # G-force alert takes priority for dangerous hits
-                            speak_alert(PLAYER_NAME, magnitude_g)
-                            print("  ⏱️ Waiting 5 seconds for dangerous hit alert processing...")
-                            time.sleep(3)  # Shorter pause, then add angular alert
-                            speak_angular_alert(PLAYER_NAME, gyro_value)
-                            time.sleep(2)
-                            print("  ✅ Dangerous hit alert processing complete")
-                            
-                        else:
-                            cooldown_remaining = ALERT_COOLDOWN - (current_time - last_alert_time)
-                            print(f"      ⚠️ Dangerous hit detected (cooldown: {cooldown_remaining:.1f}s)")
+                    # Check both thresholds (raw integers vs precomputed raw thresholds)
+                    # and determine alert priority and database send logic
+                    now = time.monotonic()
+                    pair_kind = alerts.on_pair(g_force_raw, raw_value, now)
                     
-                    elif g_threshold_exceeded:
-                        # Only G-force threshold exceeded
-                        alert_type = "g_force"
-                        current_time = time.time()
-                        if current_time - last_alert_time >= ALERT_COOLDOWN:
-                            print(f"  🚨 G-FORCE THRESHOLD EXCEEDED! ({magnitude_g:.2f}G)")
-                            should_send = True
-                            last_alert_time = current_time
-                            
-                            speak_alert(PLAYER_NAME, magnitude_g)
-                            print("  ⏱️ Waiting 5 seconds for G-force alert processing...")
-                            time.sleep(5)
-                            print("  ✅ G-force alert processing complete")
-                            
-                        else:
-                            cooldown_remaining = ALERT_COOLDOWN - (current_time - last_alert_time)
-                            print(f"  ⚠️ G-force threshold exceeded (cooldown: {cooldown_remaining:.1f}s)")
+                    if pair_kind == 'impact_start':
+                        log.info("  🚨 G-force threshold exceeded (%.2fG), tracking impact peak...", magnitude_g)
                     
-                    elif ang_threshold_exceeded:
+                    elif pair_kind == 'angular':
                         # Only Angular velocity threshold exceeded
-                        alert_type = "angular"
-                        print(f"  ⚠️ ANGULAR THRESHOLD EXCEEDED! ({gyro_value:.2f} deg/s)")
-                        should_send = True
+                        log.info("  ⚠️ ANGULAR THRESHOLD EXCEEDED! (%.2f deg/s)", gyro_value)
                         
                         speak_angular_alert(PLAYER_NAME, gyro_value)
-                        print("  ⏱️ Waiting 3 seconds for angular alert processing...")
-                        time.sleep(3)  # Shorter pause for angular-only alerts
-                        print("  ✅ Angular alert processing complete")
+                        log.info("  ⏱️ Processing angular alert for 3 seconds (still reading sensors)...")
+                        alert_processing_until = now + 3  # Shorter window for angular-only alerts
+                        if send_alert_event("angular", g_force_raw, raw_value):
+                            event_count += 1
                     
-                    else:
-                        # Neither threshold exceeded
-                        print("  ✅ Both readings within normal limits")
-                        if SEND_ALL_DATA:
-                            should_send = True
-                            alert_type = "all_data"
+                    elif pair_kind == 'angular_cooldown':
+                        log.info("  ⚠️ Angular threshold exceeded (%.2f deg/s, cooldown: %.1fs)",
+                                 gyro_value, alerts.next_angular_alert - now)
                     
-                    # Send to database with priority indication
-                    if should_send:
-                        priority_msg = {
-                            "dangerous_hit": "🚨 DANGEROUS HIT",
-                            "g_force": "⚠️ G-FORCE EVENT", 
-                            "angular": "🔄 ANGULAR EVENT",
-                            "all_data": "📊 DATA LOG"
-                        }.get(alert_type, "📊 EVENT")
-                        
-                        print(f"  � Sending {priority_msg}: G={magnitude_g:.2f}G, Angular={gyro_value:.2f} deg/s")
-                        success = send_to_database(latest_g_force, hit_count, raw_value)
-                        if success:
+                    elif pair_kind == 'normal':
+                        # Neither threshold exceeded
+                        log.info("  ✅ Both readings within normal limits")
+                        if SEND_ALL_DATA and send_alert_event("all_data", g_force_raw, raw_value):
                             event_count += 1
-                            print(f"  ✅ {priority_msg} sent to database successfully!")
-                        else:
-                            print(f"  ❌ Failed to send {priority_msg} to database")
-                        
-                        # Clear the serial buffer after recording a hit to prevent stale data
-                        ser.reset_input_buffer()
-                        print("  🗑️ Serial buffer cleared after event recorded")
                     
-                    # Only print separator after processing the complete pair
-                    print("-" * 50)
+                    # Only log separator after processing the complete pair
+                    log.info("-" * 50)
+            
+            # One console write for everything logged since the last wake-up
+            sys.stdout.flush()
+            if not reader_alive:
+                break
+        
+        # The reader only stops on a serial error (cable pulled, sensor browned out), which
+        # may be the very hit that knocked it out: its alert must still go out
+        log.warning("\n⚠️ Serial connection lost, sending any pending alert before exit")
+        impact = alerts.impact_due(float('inf'))
+        if impact is not None and alert_impact(*impact):
+            event_count += 1
+        print_session_summary(total_readings, hit_count, event_count)
                 
     except KeyboardInterrupt:
-        print(f"\n=== Session Summary ===")
-        print(f"Total sensor readings: {total_readings}")
-        print(f"Qualified hits (≥{PRINT_WORTHY_THRESHOLD_G}G): {hit_count}")
-        print(f"Hit percentage: {(hit_count/total_readings*100):.1f}%" if total_readings > 0 else "Hit percentage: 0.0%")
-        print(f"Database events sent: {event_count}")
-        print(f"Player: {PLAYER_NAME} ({TEAM_NAME})")
-        print(f"Print Worthy Threshold: {PRINT_WORTHY_THRESHOLD_G}G")
-        print(f"Alert Threshold: {THRESHOLD_G}G")
-        print(f"Angular Threshold: {THRESHOLD_GYRO} deg/s")
+        print_session_summary(total_readings, hit_count, event_count)
     finally:
+        # Stop the reader before closing the port it is reading from
+        stop_reading.set()
+        reader.join(timeout=1)
         ser.close()
         print("Serial connection closed.")
 
+# Simulated readings are drawn in batches rather than one RNG call per sample
+SIM_BATCH = 4096
+
+def draw_simulated_readings(rng):
+    """Draw SIM_BATCH simulated (G-force, gyroscope) raw readings from a numpy Generator"""
+    normals = rng.integers(50, 151, size=SIM_BATCH)  # 0.5G to 1.5G
+    bigs = rng.integers(250, 501, size=SIM_BATCH)    # 2.5G to 5G
+    # 80% normal readings, 20% above threshold
+    magnitudes = np.where(rng.random(SIM_BATCH) < 0.8, normals, bigs)
+    gyros = rng.integers(-800, 801, size=SIM_BATCH)  # -800 to +800 deg/s
+    return magnitudes.tolist(), gyros.tolist()
+
 if __name__ == "__main__":
-    import sys
+    # Buffer stdout even on a console: log records and print() output share it and are
+    # written together when main() flushes after each batch of samples
+    if hasattr(sys.stdout, "reconfigure"):
+        sys.stdout.reconfigure(line_buffering=False)
+    logging.basicConfig(level=logging.DEBUG if DEBUG else logging.INFO, format="%(message)s",
+                        handlers=[_DeferredFlushHandler(sys.stdout)])
     
     # Check for command line arguments
     if len(sys.argv) > 1 and sys.argv[1] == "--test-db":
@@ -426,24 +555,22 @@ if __name__ == "__main__":
             print("Database test failed. Exiting.")
             sys.exit(1)
         
-        # Simulate some readings
-        import random
-        import time
+        # Simulate some readings; an optional seed (--simulate 42) makes a run repeatable
+        rng = np.random.default_rng(int(sys.argv[2]) if len(sys.argv) > 2 else None)
         
         print("\nSimulating accelerometer and gyroscope readings (Ctrl+C to stop):")
         hit_count = 0
+        magnitudes, gyros = draw_simulated_readings(rng)
         
         try:
             while True:
                 hit_count += 1
                 # Simulate G-force readings - mostly normal, some above threshold
-                if random.random() < 0.8:  # 80% normal readings
-                    magnitude_raw = random.randint(50, 150)  # 0.5G to 1.5G
-                else:  # 20% above threshold
-                    magnitude_raw = random.randint(250, 500)  # 2.5G to 5G
-                
-                # Simulate gyroscope readings
-                gyro_raw = random.randint(-800, 800)  # -800 to +800 deg/s
+                i = (hit_count - 1) % SIM_BATCH
+                if i == 0 and hit_count > 1:
+                    magnitudes, gyros = draw_simulated_readings(rng)
+                magnitude_raw = magnitudes[i]
+                gyro_raw = gyros[i]
                 
                 magnitude_g = magnitude_raw / MAGNITUDE_SCALE
                 print(f"Hit #{hit_count}: G-Force {magnitude_g:.2f}G", end="")
@@ -457,16 +584,9 @@ if __name__ == "__main__":
                     # Trigger text-to-speech alert in simulation mode too
                     speak_alert(PLAYER_NAME, magnitude_g)
                     
-                    success = send_to_database(magnitude_raw, hit_count, gyro_raw)
-                    if success:
-                        print("  ✅ Event sent successfully!")
-                    else:
-                        print("  ❌ Failed to send event")
-                    
-                    # Add 5-second pause after threshold alert in simulation mode too
-                    print("  ⏱️ Waiting 5 seconds for alert processing...")
-                    time.sleep(5)
-                    print("  ✅ Alert processing complete, continuing simulation")
+                    # Same background sender as the serial loop; the result is printed by http_client
+                    if enqueue_event(build_event_payload(magnitude_raw, gyro_raw), urgent=True):
+                        print("  📤 Event queued for database")
                     
                 else:
                     print(" (normal)")
@@ -483,10 +603,15 @@ if __name__ == "__main__":
                     print(f"  📐 Raw angular reading: {gyro_raw}")
                 
                 print("-" * 50)
+                sys.stdout.flush()  # stdout is not line-buffered (see above)
                 time.sleep(2)  # Wait 2 seconds between readings
                 
         except KeyboardInterrupt:
+            # Same as the serial loop: give queued events a moment to reach the database
+            if not http_client.flush():
+                print("\n⚠️ Some queued events could not be sent before exit")
             print(f"\nSimulation stopped. Total hits: {hit_count}")
+            print(f"Database events sent: {http_client.events_sent()}")
     else:
         # Normal mode - run with serial port
         main()
\ No newline at end of file
@@ -0,0 +1,294 @@
+"""
+Shared HTTP client for the accelerometer readers
+One pooled session to the events API, reused by every sender in the process
+"""
+
+import logging
+import math
+import os
+import queue
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+log = logging.getLogger("accel")
+
+# orjson is several times faster on these small dicts; the stdlib encoder is the
+# fallback, with compact separators so both produce the same bytes. NaN/Infinity are
+# not valid JSON: the fallback raises on them (orjson would write null instead)
+try:
+    from orjson import dumps as _dumps
+except ImportError:
+    import json
+    def _dumps(obj):
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, allow_nan=False).encode()
+
+# Batching of routine events; both can be overridden through the environment
+API_BATCH_LIMIT = 100  # MAX_BATCH_SIZE in web/src/app/api/admin/events/batch/route.ts; keep in sync
+BATCH_MAX = min(int(os.environ.get("BATCH_MAX", 20)), API_BATCH_LIMIT)  # maximum events per batch POST
+BATCH_WINDOW_MS = int(os.environ.get("BATCH_WINDOW_MS", 250))  # wait for more events before flushing
+QUEUE_MAX = 64      # events held while the API is slow or unreachable
+SENDER_THREADS = 2  # POSTs that may be in flight at once
+TIMEOUT = (2, 5)    # (connect, read) seconds per request
+BREAKER_FAILURES = 3   # consecutive sends to an unreachable API that open the circuit breaker
+BREAKER_COOLDOWN = 30  # seconds routine events are dropped, without a request, once it opens
+
+# Shared HTTP session: keeps the connection to the database API alive between
+# events instead of paying a new TCP/TLS handshake for every hit
+SESSION = requests.Session()
+_ADAPTER = HTTPAdapter(
+    pool_connections=2,
+    pool_maxsize=4,
+    # urllib3 does not retry POST on these statuses by default; it is allowed here because
+    # a gateway error may hide a stored event (a duplicate row) but a lost alert is worse
+    max_retries=Retry(total=2, backoff_factor=0.3, status_forcelist=[502, 503, 504],
+                      allowed_methods=frozenset({"HEAD", "POST"})),
+)
+SESSION.mount("http://", _ADAPTER)
+SESSION.mount("https://", _ADAPTER)
+SESSION.headers.update({"Content-Type": "application/json"})
+
+_database_url = None
+_player_name = None
+_payload_prefix = b'{'
+_batch_supported = True
+
+def configure(database_url, api_key, player_name, team_name):
+    """Point the client at the events API; call once after loading config"""
+    global _database_url, _player_name, _payload_prefix
+    _database_url = database_url
+    _player_name = player_name
+    SESSION.headers["x-api-key"] = api_key
+    # playerName/team never change, so their JSON is encoded once here;
+    # only the per-event fields are serialized on each send
+    _payload_prefix = _dumps({"playerName": player_name, "team": team_name})[:-1] + b','
+
+def warm_up():
+    """Open the pooled connection in the background so the first event skips the TCP/TLS handshake"""
+    def _connect():
+        try:
+            # any response will do; only the kept-alive socket matters
+            SESSION.head(_database_url, timeout=TIMEOUT)
+        except requests.exceptions.RequestException as e:
+            log.debug("  Connection warm-up failed: %s", e)
+    threading.Thread(target=_connect, name="db-warmup", daemon=True).start()
+
+# (epoch second, formatted string) of the last timestamp handed out
+_ts_cache = (0, "")
+
+def utc_timestamp():
+    """Current time as an ISO 8601 UTC string; formatted at most once per second"""
+    global _ts_cache
+    now = int(time.time())
+    if now != _ts_cache[0]:
+        _ts_cache = (now, time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(now)))
+    return _ts_cache[1]
+
+def encode_event(payload):
+    """JSON-encode an event in the exact format required by the API"""
+    return _payload_prefix + _dumps(payload)[1:]
+
+def _encode_or_drop(payload):
+    """encode_event(), or None if the payload cannot be serialized (logged and dropped)"""
+    try:
+        # checked here so both encoders drop the event: as null it would fail the API's
+        # number check, and in a batch take every other event down with it
+        for value in payload.values():
+            if isinstance(value, float) and not math.isfinite(value):
+                raise ValueError(f"non-finite number {value!r}")
+        return encode_event(payload)
+    except (TypeError, ValueError) as e:  # orjson.JSONEncodeError is a TypeError
+        log.error("  ❌ Event cannot be encoded, dropping it: %s (%r)", e, payload)
+        return None
+
+# Outcome of one POST. Only an API that cannot be reached or is failing (connection
+# error, timeout, 5xx) counts toward the circuit breaker; a rejected event (4xx) does not
+_STORED, _REJECTED, _UNREACHABLE = "stored", "rejected", "unreachable"
+
+def post_event(payload):
+    """POST one event payload to the database API; returns True if it was stored"""
+    return _post_one(payload) == _STORED
+
+def _post_one(payload):
+    """POST one event payload; returns _STORED, _REJECTED or _UNREACHABLE"""
+    acceleration_g = payload["accelerationG"]
+    body = _encode_or_drop(payload)
+    if body is None:
+        return _REJECTED
+
+    # Debug output only; %s arguments are not formatted unless DEBUG logging is on
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("  📡 Sending to database: %.1fG...", acceleration_g)
+        log.debug("  URL: %s", _database_url)
+        log.debug("  Payload: %s", body)
+
+    try:
+        # Headers (content type, API key) are set on the session
+        response = SESSION.post(_database_url, data=body, timeout=TIMEOUT)
+
+        # response.text decodes the whole body, so only touch it when DEBUG is on
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("  Status Code: %s", response.status_code)
+            log.debug("  Response Headers: %s", response.headers)
+            log.debug("  Response Body: %s", response.text)
+
+        if response.status_code in [200, 201]:
+            print(f"  ✅ SUCCESS! Event sent to database: {_player_name} - {acceleration_g:.1f}G")
+            return _STORED
+        else:
+            print(f"  ❌ FAILED: HTTP {response.status_code}")
+            print(f"  Response: {response.text}")
+            return _UNREACHABLE if response.status_code >= 500 else _REJECTED
+
+    except requests.exceptions.ConnectionError as e:
+        print(f"  ❌ CONNECTION ERROR: {e}")
+        print(f"  Make sure you have internet connection to reach {_database_url}")
+        return _UNREACHABLE
+    except requests.exceptions.RequestException as e:
+        print(f"  ❌ REQUEST ERROR: {e}")
+        return _UNREACHABLE
+    except Exception as e:
+        print(f"  ❌ UNEXPECTED ERROR: {e}")
+        return _REJECTED
+
+def post_event_batch(payloads):
+    """POST several event payloads in one request; returns how many were stored"""
+    return _post_batch(payloads)[0]
+
+def _post_batch(payloads):
+    """POST several event payloads in one request; returns (events stored, whether the
+    API was unreachable rather than rejecting them)"""
+    global _batch_supported
+    # encoded one by one so a single bad payload is dropped instead of the whole batch
+    bodies = [_encode_or_drop(payload) for payload in payloads]
+    payloads = [payload for payload, body in zip(payloads, bodies) if body is not None]
+    if not payloads:
+        return 0, False
+    if _batch_supported:
+        log.debug("  📡 Sending batch of %d events to database...", len(payloads))
+        try:
+            body = b'{"events":[' + b','.join(body for body in bodies if body is not None) + b']}'
+            response = SESSION.post(_database_url + "/batch", data=body, timeout=TIMEOUT)
+
+            if response.status_code in [200, 201]:
+                print(f"  ✅ SUCCESS! {len(payloads)} events sent to database")
+                return len(payloads), False
+            elif response.status_code in [404, 405]:
+                # Older API without the batch route: fall back to one POST per event
+                print("  ⚠️ Batch endpoint not available, sending events individually")
+                _batch_supported = False
+            else:
+                print(f"  ❌ FAILED: HTTP {response.status_code}")
+                print(f"  Response: {response.text}")
+                return 0, response.status_code >= 500
+
+        except requests.exceptions.RequestException as e:
+            print(f"  ❌ REQUEST ERROR: {e}")
+            return 0, True
+
+    outcomes = [_post_one(payload) for payload in payloads]
+    stored = outcomes.count(_STORED)
+    return stored, not stored and _UNREACHABLE in outcomes
+
+# Events waiting to be POSTed by the background sender threads; bounded so an
+# API outage cannot grow memory without limit
+_SEND_QUEUE = queue.Queue(maxsize=QUEUE_MAX)
+_sender_threads = []
+_events_sent = 0
+_sent_lock = threading.Lock()  # also guards the circuit-breaker state below
+_fail_count = 0
+_breaker_until = 0  # monotonic time the breaker closes again
+
+def _database_sender():
+    """Background worker: POST queued events so the serial loop never waits on the network.
+    Routine events arriving close together are coalesced into one batch request;
+    urgent (threshold) events flush immediately."""
+    while True:
+        payload, urgent = _SEND_QUEUE.get()
+        batch = [payload]
+        deadline = time.monotonic() + BATCH_WINDOW_MS / 1000.0
+        while not urgent and len(batch) < BATCH_MAX:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                payload, urgent = _SEND_QUEUE.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(payload)
+
+        try:
+            _send_batch(batch, urgent)
+        except Exception:
+            # never let one bad batch kill a sender thread and leave flush() waiting
+            log.exception("  ❌ Unexpected error sending %d event(s)", len(batch))
+        finally:
+            for _ in batch:
+                _SEND_QUEUE.task_done()
+
+def _send_batch(batch, urgent):
+    """POST one collected batch, honouring and updating the circuit breaker"""
+    global _events_sent, _fail_count, _breaker_until
+    to_send = batch
+    if time.monotonic() < _breaker_until:
+        # API known to be down: fail fast instead of waiting out TIMEOUT per request.
+        # A threshold alert (always last, it ends the batch) is still attempted
+        to_send = batch[-1:] if urgent else []
+        if len(batch) > len(to_send):
+            log.warning("  ⚠️ Database unreachable (circuit open), dropping %d event(s)",
+                        len(batch) - len(to_send))
+    if to_send:
+        if len(to_send) == 1:
+            outcome = _post_one(to_send[0])
+            stored, unreachable = int(outcome == _STORED), outcome == _UNREACHABLE
+        else:
+            stored, unreachable = _post_batch(to_send)
+        with _sent_lock:
+            _events_sent += stored
+            if not unreachable:
+                _fail_count = 0
+                _breaker_until = 0  # the API answered: close the breaker again
+            else:
+                _fail_count += 1
+                if _fail_count >= BREAKER_FAILURES:
+                    _fail_count = 0
+                    _breaker_until = time.monotonic() + BREAKER_COOLDOWN
+                    log.warning("  ⚠️ %d failed sends in a row, pausing routine database sends for %ds",
+                                BREAKER_FAILURES, BREAKER_COOLDOWN)
+
+def enqueue_event(payload, urgent=False):
+    """Hand an event to the background senders instead of POSTing inline.
+    Urgent events (threshold alerts) are sent at once; others may wait up to
+    BATCH_WINDOW_MS to share a batch POST. Never blocks: if the queue is full
+    the event is dropped and False is returned."""
+    if not _sender_threads:
+        for n in range(SENDER_THREADS):
+            thread = threading.Thread(target=_database_sender, name=f"db-sender-{n}", daemon=True)
+            thread.start()
+            _sender_threads.append(thread)
+    try:
+        _SEND_QUEUE.put_nowait((payload, urgent))
+        return True
+    except queue.Full:
+        log.warning("  ⚠️ Send queue full (%d events), dropping %.1fG event",
+                    QUEUE_MAX, payload["accelerationG"])
+        return False
+
+def flush(timeout=5.0):
+    """Wait up to timeout seconds for queued events to be sent (Queue.join() with a deadline,
+    so shutdown cannot hang on an unreachable API); returns True if everything went out"""
+    deadline = time.monotonic() + timeout
+    with _SEND_QUEUE.all_tasks_done:
+        while _SEND_QUEUE.unfinished_tasks:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            _SEND_QUEUE.all_tasks_done.wait(remaining)
+    return True
+
+def events_sent():
+    """Number of events the background sender has stored so far"""
+    return _events_sent
@@ -0,0 +1,68 @@
+"""
+Shared serial-port helpers for the accelerometer readers
+Port discovery, connection set-up and line splitting, used by every reader in the process
+"""
+
+import functools
+import os
+
+import serial
+import serial.tools.list_ports
+
+@functools.lru_cache(maxsize=1)
+def _comports_once():
+    """Enumerate serial ports once; startup asks several times and the OS probe is slow"""
+    return tuple((port.device, port.description) for port in serial.tools.list_ports.comports())
+
+def list_available_ports(show=True):
+    """List all available serial ports"""
+    ports = _comports_once()
+    if show:
+        for device, description in ports:
+            print(f"Found port: {device} - {description}")
+    return [device for device, _ in ports]
+
+def get_serial_connection(port=None, baudrate=38400):
+    """Establish serial connection with error handling"""
+    if port is None:
+        # Auto-detect available ports (already listed by main)
+        available_ports = list_available_ports(show=False)
+        if not available_ports:
+            print("No serial ports found!")
+            return None
+
+        # Use the first available port
+        port = available_ports[0]
+        print(f"Using port: {port}")
+
+    try:
+        # Explicit read timeout: read_serial_lines() waits at most this long for the
+        # first byte when the port is idle, then takes everything buffered in one read
+        ser = serial.Serial(port=port, baudrate=baudrate, timeout=0.1)
+        print(f"Successfully connected to {port} at {baudrate} baud")
+        set_low_latency(ser)
+        return ser
+    except serial.SerialException as e:
+        print(f"Failed to connect to {port}: {e}")
+        return None
+
+def set_low_latency(ser):
+    """Drop the USB-serial latency timer to 1 ms where the OS exposes it (FTDI on Linux).
+    The default 16 ms timer holds back short lines like 'MAG: 123'; failure is harmless."""
+    path = f"/sys/bus/usb-serial/devices/{os.path.basename(ser.port)}/latency_timer"
+    try:
+        with open(path, "w") as f:
+            f.write("1")
+        print("USB latency timer set to 1 ms")
+    except OSError:
+        pass  # not Linux, not an FTDI bridge, or no write permission
+
+def read_serial_lines(ser, buf):
+    """Read every byte the port has waiting into buf and return the complete lines in it
+    (raw bytes, not decoded). Partial lines stay in buf until the rest arrives."""
+    buf += ser.read(ser.in_waiting or 1)
+    lines = []
+    while (i := buf.find(b'\n')) != -1:
+        lines.append(bytes(buf[:i]))
+        del buf[:i + 1]
+    return lines
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Test script for the alert timing in accelerometer_reader_clean.py
+Feeds sensor pairs straight into AlertTracker with explicit timestamps, no serial port needed
+"""
+
+from accelerometer_reader_clean import (AlertTracker, ALERT_COOLDOWN, IMPACT_DEBOUNCE,
+                                        IMPACT_MAX_WAIT, MAGNITUDE_SCALE, GYROSCOPE_SCALE)
+
+SAMPLE_PERIOD = 0.02  # 50 Hz, the sensor's pair rate
+
+# Raw readings comfortably inside / beyond the default thresholds
+NORMAL_G_RAW = 1 * MAGNITUDE_SCALE
+HIGH_G_RAW = 5 * MAGNITUDE_SCALE
+NORMAL_GYRO_RAW = 10 * GYROSCOPE_SCALE
+HIGH_GYRO_RAW = 400 * GYROSCOPE_SCALE
+
+def test_angular_alert_once_per_rotation():
+    """A half-second rotation over the gyro threshold produces a single angular alert"""
+    tracker = AlertTracker()
+    kinds = [tracker.on_pair(NORMAL_G_RAW, HIGH_GYRO_RAW, n * SAMPLE_PERIOD) for n in range(25)]
+    assert kinds.count('angular') == 1
+    assert kinds[0] == 'angular'
+    assert set(kinds[1:]) == {'angular_cooldown'}
+
+def test_angular_alert_again_after_cooldown():
+    """Once ALERT_COOLDOWN has passed, a new rotation alerts again"""
+    tracker = AlertTracker()
+    assert tracker.on_pair(NORMAL_G_RAW, -HIGH_GYRO_RAW, 0.0) == 'angular'
+    assert tracker.on_pair(NORMAL_G_RAW, -HIGH_GYRO_RAW, ALERT_COOLDOWN - SAMPLE_PERIOD) == 'angular_cooldown'
+    assert tracker.on_pair(NORMAL_G_RAW, -HIGH_GYRO_RAW, ALERT_COOLDOWN) == 'angular'
+
+def test_impact_alert_after_debounce():
+    """A short impact alerts once, IMPACT_DEBOUNCE after its last crossing, with its peak"""
+    tracker = AlertTracker()
+    assert tracker.on_pair(HIGH_G_RAW, NORMAL_GYRO_RAW, 0.0) == 'impact_start'
+    assert tracker.on_pair(HIGH_G_RAW + 100, NORMAL_GYRO_RAW, SAMPLE_PERIOD) == 'impact'
+    assert tracker.impact_due(SAMPLE_PERIOD + IMPACT_DEBOUNCE / 2) is None
+    assert tracker.impact_due(SAMPLE_PERIOD + IMPACT_DEBOUNCE) == (HIGH_G_RAW + 100, NORMAL_GYRO_RAW)
+    assert tracker.impact_due(1.0) is None
+
+def test_impact_alert_not_held_back_by_continuous_crossings():
+    """Crossings that never stop (pile-up, saturated sensor) alert once, by IMPACT_MAX_WAIT"""
+    tracker = AlertTracker()
+    fired_at = []
+    for n in range(500):  # ten seconds of crossings, one every sample
+        now = n * SAMPLE_PERIOD
+        tracker.on_pair(HIGH_G_RAW, NORMAL_GYRO_RAW, now)
+        if tracker.impact_due(now) is not None:
+            fired_at.append(now)
+    assert len(fired_at) == 1
+    assert fired_at[0] <= IMPACT_MAX_WAIT + SAMPLE_PERIOD
+
+def test_new_impact_after_crossings_stop():
+    """Once crossings pause for IMPACT_DEBOUNCE, the next one is a new impact with its own alert"""
+    tracker = AlertTracker()
+    for n in range(50):  # one second of crossings: alerted at IMPACT_MAX_WAIT
+        tracker.on_pair(HIGH_G_RAW, NORMAL_GYRO_RAW, n * SAMPLE_PERIOD)
+        tracker.impact_due(n * SAMPLE_PERIOD)
+    last = 49 * SAMPLE_PERIOD
+    assert tracker.on_pair(HIGH_G_RAW, NORMAL_GYRO_RAW, last + IMPACT_DEBOUNCE / 2) == 'impact'
+    restart = last + IMPACT_DEBOUNCE / 2 + IMPACT_DEBOUNCE
+    assert tracker.on_pair(HIGH_G_RAW + 50, NORMAL_GYRO_RAW, restart) == 'impact_start'
+    assert tracker.impact_due(restart + IMPACT_DEBOUNCE) == (HIGH_G_RAW + 50, NORMAL_GYRO_RAW)
+
+if __name__ == "__main__":
+    for test in (test_angular_alert_once_per_rotation,
+                 test_angular_alert_again_after_cooldown,
+                 test_impact_alert_after_debounce,
+                 test_impact_alert_not_held_back_by_continuous_crossings,
+                 test_new_impact_after_crossings_stop):
+        test()
+        print(f"✅ {test.__name__}")
@@ -5,7 +5,7 @@ Tests sending data in your exact API format
 """
 
 import requests
-from datetime import datetime
+import time
 import json
 
 # Configuration (matching your curl command)
@@ -23,7 +23,7 @@ def test_database_connection():
     payload = {
         "playerName": PLAYER_NAME,
         "team": TEAM_NAME,
-        "occurredAt": datetime.now().strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "occurredAt": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
         "accelerationG": test_acceleration
     }
     
@@ -78,7 +78,7 @@ def test_multiple_events():
         payload = {
             "playerName": PLAYER_NAME,
             "team": TEAM_NAME,
-            "occurredAt": datetime.now().strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "occurredAt": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
             "accelerationG": acceleration
         }
         
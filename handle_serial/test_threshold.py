@@ -6,7 +6,6 @@ Simulates accelerometer readings and tests threshold alerts
 
 import time
 import random
-from datetime import datetime
 import requests
 
 # Import your functions (make sure accelerometer_reader.py is in the same directory)
@@ -0,0 +1,53 @@
+import { NextRequest, NextResponse } from "next/server";
+import { prisma } from "@/lib/db";
+
+// The accelerometer readers cap their batches at this size (API_BATCH_LIMIT in
+// handle_serial/http_client.py); keep the two in sync
+const MAX_BATCH_SIZE = 100;
+
+function requireAdmin(req: NextRequest) {
+  const key = req.headers.get("x-api-key");
+  return !!key && key === process.env.ADMIN_API_KEY;
+}
+
+type EventInput = {
+  playerName?: string;
+  team?: string | null;
+  occurredAt?: string;
+  accelerationG?: number;
+  angularVelocity?: number;
+};
+
+export async function POST(req: NextRequest) {
+  if (!requireAdmin(req)) {
+    return NextResponse.json({ error: "unauthorized" }, { status: 401 });
+  }
+
+  try {
+    const body = await req.json();
+    const events: EventInput[] | undefined = body?.events;
+    if (!Array.isArray(events) || events.length === 0 || events.length > MAX_BATCH_SIZE) {
+      return NextResponse.json({ error: `events must be a non-empty array of at most ${MAX_BATCH_SIZE} items` }, { status: 400 });
+    }
+    const invalid = events.findIndex(
+      (ev) => !ev?.playerName || !ev.occurredAt || typeof ev.accelerationG !== "number" || typeof ev.angularVelocity !== "number"
+    );
+    if (invalid !== -1) {
+      return NextResponse.json({ error: `event ${invalid}: playerName, occurredAt, accelerationG, and angularVelocity are required` }, { status: 400 });
+    }
+
+    const result = await prisma.event.createMany({
+      data: events.map((ev) => ({
+        playerName: ev.playerName!,
+        team: ev.team ?? null,
+        occurredAt: new Date(ev.occurredAt!),
+        accelerationG: ev.accelerationG!,
+        angularVelocity: ev.angularVelocity!,
+      })),
+    });
+    return NextResponse.json({ count: result.count }, { status: 201 });
+  } catch (e) {
+    const message = e instanceof Error ? e.message : "invalid request";
+    return NextResponse.json({ error: message }, { status: 400 });
+  }
+}